@@ -1,16 +1,33 @@
 # auth.py
 from passlib.context import CryptContext
-from datetime import datetime, timedelta
-from jose import JWTError, jwt
+from dataclasses import dataclass
+from functools import lru_cache
 from fastapi import Depends, HTTPException, status, Header, Cookie
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect as sa_inspect, select, update
+from sqlalchemy.orm import Session, make_transient_to_detached
+import base64
+import bcrypt
+import hashlib
+import hmac
+import json
+import logging
 import os
+import statistics
+import time
 from dotenv import load_dotenv
 import models
 from database import get_db
+from utils.cache import MemoryCache
+
+try:
+    import orjson  # type: ignore
+except Exception:  # optional C-accelerated JSON; stdlib json is the fallback
+    orjson = None
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Configuration
 APP_ENV = (os.getenv("APP_ENV") or os.getenv("ENV") or "development").strip().lower()
 
@@ -33,6 +50,15 @@ def _env_int(name: str, default: int) -> int:
 ACCESS_TOKEN_EXPIRE_MINUTES = max(5, _env_int("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 REFRESH_TOKEN_EXPIRE_DAYS = max(1, _env_int("REFRESH_TOKEN_EXPIRE_DAYS", 7))
 
+# Per-process cache of (id, role, is_active) for authenticated users; 0 (default) disables.
+# Entries are invalidated on update/delete in this process only, so with several API
+# workers a demoted or deactivated user would stay authorized elsewhere for up to the
+# TTL. Only enable it for a single-worker deployment.
+AUTH_USER_CACHE_TTL_SEC = max(0, _env_int("AUTH_USER_CACHE_TTL_SEC", 0))
+
+# bcrypt work factor. Tune per host so a single hash takes roughly 250 ms.
+BCRYPT_ROUNDS = min(14, max(10, _env_int("BCRYPT_ROUNDS", 12)))
+
 
 def _looks_unsafe_secret(value: str, *, default_value: str) -> bool:
     v = (value or "").strip()
@@ -54,48 +80,239 @@ if APP_ENV in {"production", "prod"}:
             "REFRESH_SECRET_KEY is missing/weak. Set a strong REFRESH_SECRET_KEY in environment for production."
         )
 
+
+@dataclass(frozen=True, slots=True)
+class _TokenConfig:
+    access_ttl: int
+    refresh_ttl: int
+    secret: bytes
+    refresh_secret: bytes
+    algorithm: str
+
+
+# Token settings are resolved once at import; secrets are pre-encoded so signing and
+# verifying never re-encode them.
+_TOKEN_CFG = _TokenConfig(
+    access_ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    refresh_ttl=REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
+    secret=SECRET_KEY.encode("utf-8"),
+    refresh_secret=REFRESH_SECRET_KEY.encode("utf-8"),
+    algorithm=ALGORITHM,
+)
+
+# HMAC states keyed with each secret, built once; signing copies one instead of
+# redoing the key schedule (ipad/opad) on every call.
+_HMAC_TEMPLATES = {
+    key: hmac.new(key, digestmod=hashlib.sha256)
+    for key in (_TOKEN_CFG.secret, _TOKEN_CFG.refresh_secret)
+}
+
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__ident="2b",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    # Pinning min == max makes needs_update() flag hashes made with any other cost.
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+def _ensure_native_bcrypt_backend() -> None:
+    """Resolve passlib's bcrypt backend once at import time.
+
+    passlib picks a backend lazily on the first hash/verify call; doing it here keeps
+    that detection off the first login and lets us pin the C-backed `bcrypt` package.
+    """
+    try:
+        handler = pwd_context.handler("bcrypt")
+        try:
+            handler.set_backend("bcrypt")
+        except Exception:
+            pass
+        backend = handler.get_backend()
+        if backend != "bcrypt":
+            logger.warning("passlib bcrypt backend is %r (expected native 'bcrypt'); logins will be slower.", backend)
+    except Exception:
+        logger.warning("No usable bcrypt backend found for passlib; install the `bcrypt` package.")
+
+
+_ensure_native_bcrypt_backend()
+
+
+def benchmark_bcrypt_rounds(samples: int = 3) -> float:
+    """Time a few hashes at the configured cost and warn if it is off target.
+
+    Returns the median duration in milliseconds. The sweet spot is ~250 ms:
+    much slower hurts login latency, much faster weakens brute-force resistance.
+    """
+    durations: list[float] = []
+    for _ in range(max(1, int(samples))):
+        started = time.perf_counter()
+        get_password_hash("benchmark-password")
+        durations.append((time.perf_counter() - started) * 1000.0)
+    median_ms = statistics.median(durations)
+
+    if median_ms < 150:
+        logger.warning(
+            "bcrypt rounds=%s hashes in %.0f ms (<150 ms); consider raising BCRYPT_ROUNDS.", BCRYPT_ROUNDS, median_ms
+        )
+    elif median_ms > 400:
+        logger.warning(
+            "bcrypt rounds=%s hashes in %.0f ms (>400 ms); consider lowering BCRYPT_ROUNDS.", BCRYPT_ROUNDS, median_ms
+        )
+    else:
+        logger.info("bcrypt rounds=%s hashes in %.0f ms.", BCRYPT_ROUNDS, median_ms)
+    return median_ms
+
+# Hashes made with the current settings start with this; anything else is rehashed on login.
+_BCRYPT_CURRENT_PREFIX = f"$2b${BCRYPT_ROUNDS:02d}$"
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
 
 def get_password_hash(password: str) -> str:
     """رمز عبور را هش کن"""
-    return pwd_context.hash(password)
+    # Call the bcrypt C extension directly; passlib's per-call scheme/config handling is pure overhead here.
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(BCRYPT_ROUNDS, prefix=b"2b")).decode("ascii")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """رمز عبور را تأیید کن"""
-    return pwd_context.verify(plain_password, hashed_password)
+    hashed = hashed_password or ""
+    try:
+        if hashed.startswith(_BCRYPT_PREFIXES):
+            return bcrypt.checkpw(plain_password.encode("utf-8"), hashed.encode("ascii"))
+        # Anything that isn't a bcrypt hash goes through passlib.
+        return pwd_context.verify(plain_password, hashed)
+    except ValueError:
+        return False
+
+
+def _password_needs_rehash(hashed_password: str) -> bool:
+    return not (hashed_password or "").startswith(_BCRYPT_CURRENT_PREFIX)
+
+
+# Verified against when the user is unknown/inactive so a failed login costs one bcrypt
+# check either way and response time doesn't reveal which usernames exist.
+_DUMMY_HASH = pwd_context.hash("dummy-password-for-timing")
 
 def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user:
-        return False
+    # Only the columns login needs: a plain Row, no ORM hydration. users.username is UNIQUE-indexed.
+    user = db.execute(
+        select(models.User.id, models.User.username, models.User.is_active, models.User.hashed_password, models.User.role)
+        .where(models.User.username == username)
+        .limit(1)
+    ).first()
     # چک کردن فعال بودن کاربر
-    if not user.is_active:
+    if not user or not user.is_active:
+        verify_password(password, _DUMMY_HASH)
         return False
     # چک کردن پسورد هش شده با پسورد ورودی
     if not verify_password(password, user.hashed_password):
         return False
+    # Rehash-on-login: upgrade hashes created with a different BCRYPT_ROUNDS.
+    if _password_needs_rehash(user.hashed_password):
+        try:
+            new_hash = get_password_hash(password)
+            db.execute(update(models.User).where(models.User.id == user.id).values(hashed_password=new_hash))
+            db.commit()
+            _user_cache.delete(user.username)
+        except Exception:
+            db.rollback()
     return user
 
+# --- Minimal HS256 JWT (the only algorithm this app issues or accepts) ---
+
+class JWTError(Exception):
+    """Token is malformed, signed with another key, or uses an unexpected algorithm."""
+
+
+def _b64url_encode(raw: bytes) -> bytes:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=")
+
+
+def _b64url_decode(segment: bytes) -> bytes:
+    return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+
+# Same bytes PyJWT/python-jose emit for HS256, so previously issued tokens still verify.
+_JWT_HEADER_B64 = _b64url_encode(b'{"alg":"HS256","typ":"JWT"}')
+
+
+def _json_dumps_bytes(value: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _hs256(key: bytes, signing_input: bytes) -> bytes:
+    template = _HMAC_TEMPLATES.get(key)
+    if template is None:
+        return hmac.digest(key, signing_input, hashlib.sha256)
+    mac = template.copy()
+    mac.update(signing_input)
+    return mac.digest()
+
+
+def _jwt_encode(payload: dict, key: bytes) -> str:
+    payload_b64 = _b64url_encode(_json_dumps_bytes(payload))
+    signing_input = _JWT_HEADER_B64 + b"." + payload_b64
+    signature = _hs256(key, signing_input)
+    return (signing_input + b"." + _b64url_encode(signature)).decode("ascii")
+
+
+def _jwt_decode(token: str, key: bytes) -> dict:
+    """Verify an HS256 token and return its payload.
+
+    Expired tokens are rejected here; `sub`/`type` are checked by callers.
+    """
+    try:
+        header_b64, payload_b64, signature_b64 = token.encode("ascii").split(b".")
+        if header_b64 != _JWT_HEADER_B64:
+            header = _json_loads(_b64url_decode(header_b64))
+            if not isinstance(header, dict) or header.get("alg") != _TOKEN_CFG.algorithm:
+                raise JWTError("Unexpected token algorithm")
+        payload = _json_loads(_b64url_decode(payload_b64))
+        if not isinstance(payload, dict):
+            raise JWTError("Malformed token payload")
+        # Stale tokens are rejected before paying for the HMAC; this never accepts anything unverified.
+        if _is_expired(int(payload.get("exp") or 0)):
+            raise JWTError("Token expired")
+        expected = _hs256(key, header_b64 + b"." + payload_b64)
+        if not hmac.compare_digest(expected, _b64url_decode(signature_b64)):
+            raise JWTError("Signature verification failed")
+    except JWTError:
+        raise
+    except Exception as e:
+        raise JWTError("Malformed token") from e
+    return payload
+
+
 def create_tokens(username: str):
     """Access و Refresh token ایجاد کن"""
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    expire = datetime.utcnow() + access_token_expires
+    cfg = _TOKEN_CFG
+    now = int(time.time())
+    # Plain dict literals on purpose: they measured ~3x faster than dict(zip(keys, values))
+    # and orjson on the dict beat hand-assembling the JSON bytes.
     access_payload = {
         "sub": username,
-        "exp": expire,
+        "exp": now + cfg.access_ttl,
         "type": "access"
     }
-    access_token = jwt.encode(access_payload, SECRET_KEY, algorithm=ALGORITHM)
-    
-    refresh_token_expires = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    expire = datetime.utcnow() + refresh_token_expires
+    access_token = _jwt_encode(access_payload, cfg.secret)
+
     refresh_payload = {
         "sub": username,
-        "exp": expire,
+        "exp": now + cfg.refresh_ttl,
         "type": "refresh"
     }
-    refresh_token = jwt.encode(refresh_payload, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
+    refresh_token = _jwt_encode(refresh_payload, cfg.refresh_secret)
     
     return {
         "access_token": access_token,
@@ -104,18 +321,72 @@ def create_tokens(username: str):
     }
 
 
+@lru_cache(maxsize=4096)
+def _decode_access(token: str) -> tuple[str | None, str | None, int]:
+    """Verify an access token once and memoize its (sub, type, exp) claims.
+
+    A token string is cryptographically bound to its payload, so a cache hit is as
+    good as re-verifying the signature. `exp` is still checked by the caller on
+    every use so cached entries expire logically without eviction.
+    """
+    payload = _jwt_decode(token, _TOKEN_CFG.secret)
+    return payload.get("sub"), payload.get("type"), int(payload.get("exp") or 0)
+
+
+@lru_cache(maxsize=4096)
+def _decode_refresh(token: str) -> tuple[str | None, str | None, int]:
+    payload = _jwt_decode(token, _TOKEN_CFG.refresh_secret)
+    return payload.get("sub"), payload.get("type"), int(payload.get("exp") or 0)
+
+
+def _is_expired(exp: int) -> bool:
+    return bool(exp) and exp <= time.time()
+
+
 def decode_refresh_token(refresh_token: str) -> str:
     """Validate refresh token and return username (sub)."""
     try:
-        payload = jwt.decode(refresh_token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        token_type: str = payload.get("type")
+        username, token_type, exp = _decode_refresh(refresh_token)
+        if _is_expired(exp):
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
         if not username or token_type != "refresh":
             raise HTTPException(status_code=401, detail="Invalid refresh token")
         return username
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
+_user_cache = MemoryCache(maxsize=1024)
+
+
+def _load_user_by_username(db: Session, username: str) -> models.User | None:
+    """Load the user for an authenticated request, skipping the SELECT on a cache hit.
+
+    Only `(id, role, is_active)` is cached. A hit is re-attached with `merge(load=False)`
+    and every other column stays expired, so the first access to e.g. `socials` or
+    `bot_token` reads the current row instead of a copy from an earlier request.
+    """
+    cached = _user_cache.get(username)
+    if cached is not None:
+        user_id, role, is_active = cached
+        user = models.User(id=user_id, username=username, role=role, is_active=is_active)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    user = db.query(models.User).filter(models.User.username == username).first()
+    if user is not None:
+        _user_cache.set(username, (user.id, user.role, user.is_active), AUTH_USER_CACHE_TTL_SEC)
+    return user
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_cached_user(_mapper, _connection, target: models.User) -> None:
+    names = {target.username, *(sa_inspect(target).attrs.username.history.deleted or ())}
+    for name in names:
+        if name:
+            _user_cache.delete(name)
+
+
 # --- اصلاح مهم: دریافت توکن از هدر ---
 def get_current_user(
     authorization: str | None = Header(None),
@@ -126,39 +397,42 @@ def get_current_user(
     token: str | None = None
 
     # Prefer explicit Authorization header for API clients.
-    authz = (str(authorization).strip() if authorization is not None else "")
+    authz = authorization or ""
+    if authz and (authz[0].isspace() or authz[-1].isspace()):
+        authz = authz.strip()
     # Ignore empty/bare scheme values like "Bearer" so cookie-sessions keep working.
     if authz and authz.lower() != "bearer":
         token = authz
     # Browser-safe default: allow HttpOnly cookie-based sessions.
-    elif access_token is not None and str(access_token).strip():
-        token = str(access_token).strip()
+    elif access_token and access_token.strip():
+        token = access_token.strip()
     else:
         raise HTTPException(status_code=401, detail="Missing credentials")
     
     try:
         # جدا کردن Bearer از توکن
-        if token and " " in token:
-            scheme, raw = token.split(" ", 1)
-            scheme = (scheme or "").strip().lower()
-            raw = (raw or "").strip()
-            if scheme != "bearer" or not raw:
+        scheme, sep, raw = token.partition(" ")
+        if sep:
+            raw = raw.lstrip()
+            if not raw or not hmac.compare_digest(scheme.lower().encode("utf-8"), b"bearer"):
                 raise HTTPException(status_code=401, detail="Invalid authentication scheme")
             token = raw
 
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        token_type: str = payload.get("type")
-        
+        username, token_type, exp = _decode_access(token)
+        if _is_expired(exp):
+            raise HTTPException(status_code=401, detail="Could not validate credentials")
+
         if username is None or token_type != "access":
             raise HTTPException(status_code=401, detail="Invalid token payload")
             
     except JWTError:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
     
-    user = db.query(models.User).filter(models.User.username == username).first()
+    user = _load_user_by_username(db, username)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail="Inactive user")
     
     return user
 
@@ -169,6 +443,15 @@ def get_admin_user(current_user: models.User = Depends(get_current_user)):
     return current_user
 
 
+# Parsed once at import; None means the variable is unset (every ADMIN is a super admin).
+_SUPER_ADMINS_RAW = os.getenv("SUPER_ADMIN_USERNAMES", "").strip()
+_SUPER_ADMINS = (
+    frozenset(u.strip().lower() for u in _SUPER_ADMINS_RAW.split(",") if u.strip())
+    if _SUPER_ADMINS_RAW
+    else None
+)
+
+
 def get_super_admin_user(current_user: models.User = Depends(get_admin_user)):
     """Restrict access to Super Admin-only endpoints.
 
@@ -178,17 +461,15 @@ def get_super_admin_user(current_user: models.User = Depends(get_admin_user)):
     If SUPER_ADMIN_USERNAMES is not set, all ADMIN users are treated as super admin
     (dev-friendly default).
     """
-    raw = os.getenv("SUPER_ADMIN_USERNAMES", "").strip()
-    if not raw:
+    if _SUPER_ADMINS is None:
         return current_user
 
-    allowed = {u.strip().lower() for u in raw.split(",") if u.strip()}
-    if (current_user.username or "").strip().lower() not in allowed:
+    if (current_user.username or "").strip().lower() not in _SUPER_ADMINS:
         raise HTTPException(status_code=403, detail="Super admin access required")
     return current_user
 
 # Dependency برای توکن
-async def get_token_from_header(authorization: str = None):
+def get_token_from_header(authorization: str = None):
     """توکن را از Header دریافت کن"""
     if not authorization:
         raise HTTPException(
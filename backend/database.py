@@ -18,11 +18,26 @@ def _env_int(name: str, default: int) -> int:
         return int(default)
 
 
+# Sized for the bot runner: BOT_DB_THREADS executor threads plus the background writers can
+# hold connections at once. The API's threadpool can briefly want more than that, so a
+# checkout waits (SQLAlchemy's default 30s) rather than failing the request.
+pool_size = _env_int("DB_POOL_SIZE", 10)
+max_overflow = _env_int("DB_MAX_OVERFLOW", 20)
+pool_timeout = _env_int("DB_POOL_TIMEOUT_SEC", 30)
+
 if "sqlite" in DATABASE_URL:
     sqlite_timeout = _env_int("SQLITE_BUSY_TIMEOUT_SEC", 30)
+    # File databases get a QueuePool (SQLAlchemy's default of 5+10 is below BOT_DB_THREADS);
+    # in-memory ones keep SingletonThreadPool, which takes no sizing.
+    sqlite_pool_kwargs = (
+        {}
+        if ":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/") == "sqlite:"
+        else {"pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": pool_timeout}
+    )
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread": False, "timeout": sqlite_timeout},
+        **sqlite_pool_kwargs,
     )
 
     @event.listens_for(engine, "connect")
@@ -36,18 +51,38 @@ if "sqlite" in DATABASE_URL:
         except Exception:
             return
 else:
-    pool_size = _env_int("DB_POOL_SIZE", 10)
-    max_overflow = _env_int("DB_MAX_OVERFLOW", 20)
-    pool_timeout = _env_int("DB_POOL_TIMEOUT_SEC", 30)
+    pool_recycle = _env_int("DB_POOL_RECYCLE_SEC", 1800)
     engine = create_engine(
         DATABASE_URL,
         pool_pre_ping=True,
         pool_size=pool_size,
         max_overflow=max_overflow,
         pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
     )
 
 
+def warm_pool(size: int | None = None) -> int:
+    """Open `size` pooled connections up front so early requests/bot updates don't pay connect cost.
+
+    Connections are held at the same time and then returned, otherwise the pool would just
+    hand back one connection N times. Returns how many connections were opened.
+    """
+    if size is None:
+        size = _env_int("DB_POOL_WARM", 5)
+    conns = []
+    try:
+        for _ in range(max(0, int(size))):
+            conns.append(engine.connect())
+    except Exception:
+        # Best-effort: a cold pool still works, it just connects lazily.
+        pass
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
+
+
 def _ensure_sqlite_table_column(table_name: str, column_name: str, sql_type: str) -> None:
     """Best-effort migration for SQLite: add a column if missing.
 
@@ -142,6 +177,9 @@ _ensure_sqlite_table_column("bot_user_registry", "phone", "VARCHAR")
 _ensure_sqlite_table_column("bot_ux_logs", "expected_action", "VARCHAR")
 _ensure_sqlite_table_column("admin_export_logs", "export_type", "VARCHAR")
 
+# v1.7+ schema additions (duplicate-question lookup)
+_ensure_sqlite_table_column("bot_submissions", "text_hash", "VARCHAR")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
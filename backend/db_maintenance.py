@@ -5,6 +5,8 @@ import logging
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
+from utils.text_hash import question_text_hash
+
 
 logger = logging.getLogger(__name__)
 
@@ -25,12 +27,20 @@ _INDEX_STMTS: list[str] = [
     # Submissions: used by candidate/admin MVP queries
     "CREATE INDEX IF NOT EXISTS ix_bot_submissions_candidate_type_id ON bot_submissions (candidate_id, type, id)",
     "CREATE INDEX IF NOT EXISTS ix_bot_submissions_type_status ON bot_submissions (type, status)",
+    # Public answered Q&A shown in the bot (deep links, category lists)
+    "CREATE INDEX IF NOT EXISTS ix_bot_submissions_public_answers ON bot_submissions (candidate_id, type, status, is_public, id)",
+    # Bot duplicate-question check (text_hash is only set on QUESTION rows)
+    "CREATE INDEX IF NOT EXISTS ix_bot_submissions_question_hash ON bot_submissions (candidate_id, type, text_hash)",
 
     # Commitments
     "CREATE INDEX IF NOT EXISTS ix_bot_commitments_candidate_id ON bot_commitments (candidate_id)",
 
     # Monitoring/logs
     "CREATE INDEX IF NOT EXISTS ix_bot_ux_logs_candidate_created ON bot_ux_logs (candidate_id, created_at)",
+    # Per-representative "latest N" monitoring views (filter candidate_id, ORDER BY id DESC);
+    # health checks grow by a few rows per bot per minute.
+    "CREATE INDEX IF NOT EXISTS ix_bot_health_checks_candidate_id ON bot_health_checks (candidate_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_technical_error_logs_candidate_id ON technical_error_logs (candidate_id, id)",
 ]
 
 
@@ -47,3 +57,33 @@ def ensure_indexes(engine: Engine) -> None:
                         logger.warning("Failed creating unique index. You likely have duplicate data. stmt=%s", stmt)
     except Exception:
         pass
+
+
+def backfill_question_text_hashes(engine: Engine, batch_size: int = 1000) -> int:
+    """Fill bot_submissions.text_hash for QUESTION rows stored before the column existed.
+
+    Idempotent; once everything is hashed this is a single empty SELECT. Returns rows updated.
+    """
+    done = 0
+    try:
+        select_stmt = text(
+            "SELECT id, text FROM bot_submissions "
+            "WHERE type = 'QUESTION' AND text_hash IS NULL AND id > :after ORDER BY id LIMIT :n"
+        )
+        update_stmt = text("UPDATE bot_submissions SET text_hash = :h WHERE id = :sid")
+        after = 0
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(select_stmt, {"after": after, "n": int(batch_size)}).all()
+                if not rows:
+                    break
+                after = rows[-1][0]
+                params = [{"h": question_text_hash(t), "sid": sid} for sid, t in rows]
+                params = [p for p in params if p["h"] is not None]
+                if params:
+                    conn.execute(update_stmt, params)
+                done += len(params)
+    except Exception:
+        # Best-effort: unhashed rows just aren't seen by the duplicate check.
+        logger.warning("Backfilling bot_submissions.text_hash failed", exc_info=True)
+    return done
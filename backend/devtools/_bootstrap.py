@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+import os
+import sys
+
+
+def ensure_backend_on_path() -> None:
+    """Make `backend/` importable when a devtool is run as a plain script."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
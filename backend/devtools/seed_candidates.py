@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import sys
+
+from _bootstrap import ensure_backend_on_path
+
+ensure_backend_on_path()
+
+from sqlalchemy import insert
+
+from auth import get_password_hash
+from database import SessionLocal
+import models
+
+
+def seed_candidates(count: int = 1, password: str = "candidate1234", prefix: str = "seed_candidate") -> None:
+    """Insert `count` active CANDIDATE users sharing one test password (for local testing).
+
+    The password is hashed once and the hash is shared, instead of paying bcrypt per user.
+    """
+    hashed = get_password_hash(password)
+    rows = [
+        {
+            "username": f"{prefix}{i + 1}",
+            "full_name": f"نماینده نمونه {i + 1}",
+            "hashed_password": hashed,
+            "role": "CANDIDATE",
+            "is_active": True,
+        }
+        for i in range(int(count))
+    ]
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(models.User), rows)
+        db.commit()
+        print(f"Seeded {len(rows)} candidate user(s): {rows[0]['username']}..{rows[-1]['username']} (password: {password})")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _parse_args(argv: list[str]) -> int:
+    if len(argv) < 2 or not str(argv[1]).strip():
+        return 1
+    try:
+        return max(1, int(str(argv[1]).strip()))
+    except Exception:
+        raise SystemExit("Usage: python backend/devtools/seed_candidates.py [count]")
+
+
+if __name__ == "__main__":
+    seed_candidates(_parse_args(sys.argv))
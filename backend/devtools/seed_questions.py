@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import sys
+
+from _bootstrap import ensure_backend_on_path
+
+ensure_backend_on_path()
+
+from sqlalchemy import func, insert
+
+from database import SessionLocal
+import models
+from tg_bot.ui_constants import QUESTION_CATEGORIES
+from utils.text_hash import question_text_hash
+
+
+def seed_candidate_questions(candidate_id: int, count: int = 1) -> None:
+    """Insert `count` answered, public QUESTION rows for a candidate (for trying the bot UI).
+
+    Uses a single Core INSERT (executemany) instead of ORM add/commit/refresh per row.
+    `answered_at` is filled by the database clock, so app/DB clock skew can't leak in.
+    """
+    texts = [f"سؤال نمونه شماره {i + 1} برای آزمایش نمایش پرسش‌ها" for i in range(int(count))]
+    rows = [
+        {
+            "candidate_id": int(candidate_id),
+            "telegram_user_id": "0",
+            "telegram_username": "seed",
+            "type": "QUESTION",
+            "topic": QUESTION_CATEGORIES[i % len(QUESTION_CATEGORIES)],
+            "text": text,
+            "text_hash": question_text_hash(text),
+            "status": "ANSWERED",
+            "answer": f"پاسخ نمونه شماره {i + 1}",
+            "is_public": True,
+            "is_featured": False,
+        }
+        for i, text in enumerate(texts)
+    ]
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(models.BotSubmission).values(answered_at=func.now()), rows)
+        db.commit()
+        print(f"Seeded {len(rows)} answered public QUESTION submission(s) for candidate_id={candidate_id}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _parse_args(argv: list[str]) -> tuple[int, int]:
+    if len(argv) < 2 or not str(argv[1]).strip():
+        raise SystemExit("Usage: python backend/devtools/seed_questions.py <candidate_id> [count]")
+    try:
+        candidate_id = int(str(argv[1]).strip())
+        count = int(str(argv[2]).strip()) if len(argv) > 2 else 1
+    except Exception:
+        raise SystemExit("candidate_id and count must be integers")
+    return candidate_id, max(1, count)
+
+
+if __name__ == "__main__":
+    seed_candidate_questions(*_parse_args(sys.argv))
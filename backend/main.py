@@ -16,7 +16,7 @@ from starlette.types import Scope
 import database
 import models
 import auth
-from db_maintenance import ensure_indexes
+from db_maintenance import backfill_question_text_hashes, ensure_indexes
 from routers._common import APP_ENV
 from routers import (
     admin as admin_router,
@@ -98,6 +98,12 @@ async def lifespan(app: FastAPI):
     except Exception:
         # Best-effort: indexes are an optimization, not a boot blocker.
         pass
+    backfill_question_text_hashes(database.engine)
+    database.warm_pool()
+    try:
+        auth.benchmark_bcrypt_rounds()
+    except Exception:
+        logger.exception("bcrypt self-benchmark failed")
     yield
     logger.info("Application shutdown")
 
@@ -221,6 +221,8 @@ class BotSubmission(Base):
     tag = Column(String, nullable=True)
 
     text = Column(Text, nullable=False)
+    # QUESTION only: utils.text_hash.question_text_hash(text), for the duplicate-question check
+    text_hash = Column(String, nullable=True)
     status = Column(String, default="NEW", index=True)
     answer = Column(Text, nullable=True)
 
@@ -2,22 +2,28 @@ from __future__ import annotations
 
 import logging
 import re
+from functools import lru_cache
 
 import httpx
 
 import database
 import models
+from utils.cache import invalidate_candidate_cache
 
 
 logger = logging.getLogger(__name__)
 
+_NUMERIC_CHAT_ID_RE = re.compile(r"-?\d{5,}")
+_TME_PATH_RE = re.compile(r"t\.me/([^/?#]+)")
+_USERNAME_RE = re.compile(r"[A-Za-z0-9_]{4,}")
+
 
 def _extract_telegram_chat_target(value: str | None) -> str | int | None:
     raw = (value or "").strip()
     if not raw:
         return None
 
-    if re.fullmatch(r"-?\d{5,}", raw):
+    if _NUMERIC_CHAT_ID_RE.fullmatch(raw):
         try:
             return int(raw)
         except Exception:
@@ -28,7 +34,7 @@ def _extract_telegram_chat_target(value: str | None) -> str | int | None:
         v = "https://" + v
 
     if v.startswith("http://") or v.startswith("https://"):
-        m = re.search(r"t\.me/([^/?#]+)", v)
+        m = _TME_PATH_RE.search(v)
         if not m:
             return None
         v = m.group(1)
@@ -40,34 +46,57 @@ def _extract_telegram_chat_target(value: str | None) -> str | int | None:
         v = v[1:]
 
     v = v.strip()
-    if not re.fullmatch(r"[A-Za-z0-9_]{4,}", v):
+    if not _USERNAME_RE.fullmatch(v):
         return None
     return f"@{v}"
 
 
-def _candidate_bot_username(candidate: models.User) -> str | None:
-    v = (getattr(candidate, "bot_name", None) or "").strip()
+def _load_candidate_bot_fields(candidate_id: int):
+    """Read bot_token/socials/bot_name in a fresh session.
+
+    Notifications run as background tasks after the request session is closed, so they
+    take ids from the endpoint and never trust its (possibly cached) user instance.
+    """
+    db = database.SessionLocal()
+    try:
+        return (
+            db.query(models.User.bot_token, models.User.socials, models.User.bot_name)
+            .filter(models.User.id == int(candidate_id))
+            .first()
+        )
+    finally:
+        db.close()
+
+
+@lru_cache(maxsize=256)
+def _bot_username_from_name(bot_name: str) -> str | None:
+    # Pure function of the stored bot_name, so each candidate's name is parsed once.
+    v = bot_name.strip()
     if v.startswith("@"):  # tolerate @BotUsername
         v = v[1:]
     v = v.split()[0] if v else ""
     if not v:
         return None
-    if not re.fullmatch(r"[A-Za-z0-9_]{4,}", v):
+    if not _USERNAME_RE.fullmatch(v):
         return None
     return v
 
 
-def notify_question_answer_published(*, candidate: models.User, submission: models.BotSubmission) -> None:
+def notify_question_answer_published(*, candidate_id: int, submission_id: int, topic: str | None = None) -> None:
     """Best-effort: notify candidate socials (group + channel) when a question gets answered.
 
     Must never fail the API request.
     """
     try:
-        token = (getattr(candidate, "bot_token", None) or "").strip()
+        candidate = _load_candidate_bot_fields(candidate_id)
+        if candidate is None:
+            return
+
+        token = (candidate.bot_token or "").strip()
         if not token:
             return
 
-        socials = getattr(candidate, "socials", None) or {}
+        socials = candidate.socials or {}
         if not isinstance(socials, dict):
             socials = {}
 
@@ -96,23 +125,25 @@ def notify_question_answer_published(*, candidate: models.User, submission: mode
         if not uniq:
             return
 
-        bot_username = _candidate_bot_username(candidate)
-        deep_link = f"https://t.me/{bot_username}?start=question_{int(submission.id)}" if bot_username else None
-
-        topic = (getattr(submission, "topic", None) or "").strip()
-        topic_line = f"\n🗂 دسته: {topic}" if topic else ""
-
-        text = (
-            "✅ پاسخ جدید به سؤال مردمی منتشر شد."
-            f"\n🔖 کد سؤال: {int(submission.id)}"
-            f"{topic_line}"
+        bot_username = _bot_username_from_name(candidate.bot_name or "")
+        deep_link = f"https://t.me/{bot_username}?start=question_{int(submission_id)}" if bot_username else None
+
+        topic = (topic or "").strip()
+        text = "\n".join(
+            filter(
+                None,
+                (
+                    "✅ پاسخ جدید به سؤال مردمی منتشر شد.",
+                    f"🔖 کد سؤال: {int(submission_id)}",
+                    f"🗂 دسته: {topic}" if topic else None,
+                ),
+            )
         )
 
-        reply_markup = (
-            {"inline_keyboard": [[{"text": "مشاهده پاسخ", "url": deep_link}]]}
-            if deep_link
-            else None
-        )
+        # Same message for every target; only chat_id changes per request.
+        payload = {"text": text, "disable_web_page_preview": True}
+        if deep_link:
+            payload["reply_markup"] = {"inline_keyboard": [[{"text": "مشاهده پاسخ", "url": deep_link}]]}
 
         url = f"https://api.telegram.org/bot{token}/sendMessage"
         with httpx.Client(timeout=10.0, trust_env=True) as client:
@@ -120,12 +151,7 @@ def notify_question_answer_published(*, candidate: models.User, submission: mode
                 try:
                     resp = client.post(
                         url,
-                        json={
-                            "chat_id": chat_id,
-                            "text": text,
-                            "disable_web_page_preview": True,
-                            **({"reply_markup": reply_markup} if reply_markup else {}),
-                        },
+                        json={"chat_id": chat_id, **payload},
                     )
                     # If we used @username and Telegram returns a numeric chat.id, persist it.
                     try:
@@ -143,7 +169,7 @@ def notify_question_answer_published(*, candidate: models.User, submission: mode
                                 ):
                                     db2 = database.SessionLocal()
                                     try:
-                                        u2 = db2.query(models.User).filter(models.User.id == int(candidate.id)).first()
+                                        u2 = db2.query(models.User).filter(models.User.id == int(candidate_id)).first()
                                         if u2:
                                             base2 = u2.socials if isinstance(u2.socials, dict) else {}
                                             next2 = dict(base2)
@@ -154,6 +180,7 @@ def notify_question_answer_published(*, candidate: models.User, submission: mode
                                             u2.socials = next2
                                             db2.add(u2)
                                             db2.commit()
+                                            invalidate_candidate_cache(int(candidate_id))
                                     finally:
                                         db2.close()
                     except Exception:
@@ -171,17 +198,21 @@ def notify_question_answer_published(*, candidate: models.User, submission: mode
         logger.exception("Question notify wrapper exception")
 
 
-def notify_feedback_answer_published(*, candidate: models.User, submission: models.BotSubmission) -> None:
+def notify_feedback_answer_published(*, candidate_id: int, submission_id: int, tag: str | None = None) -> None:
     """Best-effort: notify candidate socials (group + channel) when a feedback gets answered.
 
     Must never fail the API request.
     """
     try:
-        token = (getattr(candidate, "bot_token", None) or "").strip()
+        candidate = _load_candidate_bot_fields(candidate_id)
+        if candidate is None:
+            return
+
+        token = (candidate.bot_token or "").strip()
         if not token:
             return
 
-        socials = getattr(candidate, "socials", None) or {}
+        socials = candidate.socials or {}
         if not isinstance(socials, dict):
             socials = {}
 
@@ -210,23 +241,25 @@ def notify_feedback_answer_published(*, candidate: models.User, submission: mode
         if not uniq:
             return
 
-        bot_username = _candidate_bot_username(candidate)
-        deep_link = f"https://t.me/{bot_username}?start=feedback_{int(submission.id)}" if bot_username else None
-
-        tag = (getattr(submission, "tag", None) or "").strip()
-        tag_line = f"\n🏷 تگ: {tag}" if tag else ""
-
-        text = (
-            "✅ پاسخ به نظر/دغدغه مردمی منتشر شد."
-            f"\n🔖 کد پیام: {int(submission.id)}"
-            f"{tag_line}"
+        bot_username = _bot_username_from_name(candidate.bot_name or "")
+        deep_link = f"https://t.me/{bot_username}?start=feedback_{int(submission_id)}" if bot_username else None
+
+        tag = (tag or "").strip()
+        text = "\n".join(
+            filter(
+                None,
+                (
+                    "✅ پاسخ به نظر/دغدغه مردمی منتشر شد.",
+                    f"🔖 کد پیام: {int(submission_id)}",
+                    f"🏷 تگ: {tag}" if tag else None,
+                ),
+            )
         )
 
-        reply_markup = (
-            {"inline_keyboard": [[{"text": "مشاهده پاسخ", "url": deep_link}]]}
-            if deep_link
-            else None
-        )
+        # Same message for every target; only chat_id changes per request.
+        payload = {"text": text, "disable_web_page_preview": True}
+        if deep_link:
+            payload["reply_markup"] = {"inline_keyboard": [[{"text": "مشاهده پاسخ", "url": deep_link}]]}
 
         url = f"https://api.telegram.org/bot{token}/sendMessage"
         with httpx.Client(timeout=10.0, trust_env=True) as client:
@@ -234,12 +267,7 @@ def notify_feedback_answer_published(*, candidate: models.User, submission: mode
                 try:
                     resp = client.post(
                         url,
-                        json={
-                            "chat_id": chat_id,
-                            "text": text,
-                            "disable_web_page_preview": True,
-                            **({"reply_markup": reply_markup} if reply_markup else {}),
-                        },
+                        json={"chat_id": chat_id, **payload},
                     )
                     if not resp.is_success:
                         logger.warning(
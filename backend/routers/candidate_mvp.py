@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
 
 import auth
@@ -126,6 +127,7 @@ def delete_my_feedback_submission(
 def answer_my_feedback_submission(
     submission_id: int,
     payload: schemas.FeedbackSubmissionAnswer,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
@@ -161,7 +163,12 @@ def answer_my_feedback_submission(
     db.commit()
     db.refresh(submission)
 
-    notify_feedback_answer_published(candidate=current_user, submission=submission)
+    background_tasks.add_task(
+        notify_feedback_answer_published,
+        candidate_id=int(current_user.id),
+        submission_id=int(submission.id),
+        tag=submission.tag,
+    )
     return submission
 
 
@@ -231,6 +238,7 @@ def get_my_question_submissions(
 def answer_my_question_submission(
     submission_id: int,
     payload: schemas.QuestionSubmissionAnswer,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
@@ -271,7 +279,12 @@ def answer_my_question_submission(
     db.commit()
     db.refresh(submission)
 
-    notify_question_answer_published(candidate=current_user, submission=submission)
+    background_tasks.add_task(
+        notify_question_answer_published,
+        candidate_id=int(current_user.id),
+        submission_id=int(submission.id),
+        topic=submission.topic,
+    )
     return submission
 
 
@@ -421,14 +434,8 @@ def accept_commitment_terms(
 ):
     _require_candidate(current_user)
 
-    existing = (
-        db.query(models.CommitmentTermsAcceptance)
-        .filter(models.CommitmentTermsAcceptance.representative_id == int(current_user.id))
-        .first()
-    )
-    if existing is not None:
-        return existing
-
+    # representative_id is unique: insert first and fall back to the stored row on conflict,
+    # instead of a SELECT before every insert.
     ip_address = None
     try:
         ip_address = client_ip(request)
@@ -444,7 +451,19 @@ def accept_commitment_terms(
         version=COMMITMENT_TERMS_VERSION,
     )
     db.add(row)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Already accepted (or a concurrent accept won); acceptance is idempotent.
+        db.rollback()
+        existing = (
+            db.query(models.CommitmentTermsAcceptance)
+            .filter(models.CommitmentTermsAcceptance.representative_id == int(current_user.id))
+            .first()
+        )
+        if existing is None:
+            raise
+        return existing
     db.refresh(row)
     return row
 
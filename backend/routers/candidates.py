@@ -13,6 +13,7 @@ import auth
 import database
 import models
 import schemas
+from utils.cache import invalidate_candidate_cache, publish_candidate_changed
 
 from ._integrity import raise_from_integrity_error
 from ._telegram_profile import apply_telegram_profile_for_candidate
@@ -125,6 +126,7 @@ def create_candidate(
         db.add(new_user)
         db.commit()
         db.refresh(new_user)
+        publish_candidate_changed(new_user.id)
         return new_user
     except IntegrityError as e:
         db.rollback()
@@ -202,6 +204,8 @@ def update_candidate(
                     pass
 
         db.commit()
+        invalidate_candidate_cache(candidate.id)
+        publish_candidate_changed(candidate.id)
         db.refresh(candidate)
         return candidate
     except IntegrityError as e:
@@ -244,6 +248,8 @@ def delete_candidate(
 
     db.delete(candidate)
     db.commit()
+    invalidate_candidate_cache(candidate_id)
+    publish_candidate_changed(candidate_id)
     return {"detail": "کاندید حذف شد"}
 
 
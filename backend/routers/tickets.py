@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 import auth
 import database
@@ -19,7 +19,8 @@ def get_tickets(
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
-    q = db.query(models.Ticket).order_by(models.Ticket.id.desc())
+    # messages are part of the response; load them with the tickets instead of one query per ticket.
+    q = db.query(models.Ticket).options(joinedload(models.Ticket.messages)).order_by(models.Ticket.id.desc())
     if current_user.role == "ADMIN":
         return q.all()
     return q.filter(models.Ticket.user_id == current_user.id).all()
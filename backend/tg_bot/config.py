@@ -1,5 +1,6 @@
 import os
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -30,11 +31,48 @@ BOT_CONCURRENT_UPDATES = int((os.getenv("BOT_CONCURRENT_UPDATES") or "64").strip
 if BOT_CONCURRENT_UPDATES < 1:
     BOT_CONCURRENT_UPDATES = 1
 
+# Worker threads for run_db_query (asyncio's default executor). Keep it close to the DB
+# pool size (DB_POOL_SIZE + DB_MAX_OVERFLOW) so threads don't queue on connections.
+BOT_DB_THREADS = int((os.getenv("BOT_DB_THREADS") or "16").strip() or "16")
+if BOT_DB_THREADS < 2:
+    BOT_DB_THREADS = 2
+
 # Telegram HTTP connection pool size for bot API calls.
 TELEGRAM_CONNECTION_POOL_SIZE = int((os.getenv("TELEGRAM_CONNECTION_POOL_SIZE") or "32").strip() or "32")
 if TELEGRAM_CONNECTION_POOL_SIZE < 4:
     TELEGRAM_CONNECTION_POOL_SIZE = 4
 
+# How long the bot process reuses a candidate's profile before re-reading it (0 disables).
+# With REDIS_URL set the cache is shared and admin edits invalidate it right away; without
+# Redis, edits made in the admin panel show up in the bot within this many seconds.
+BOT_CANDIDATE_CACHE_TTL_SEC = int((os.getenv("BOT_CANDIDATE_CACHE_TTL_SEC") or "60").strip() or "60")
+if BOT_CANDIDATE_CACHE_TTL_SEC < 0:
+    BOT_CANDIDATE_CACHE_TTL_SEC = 0
+
+# How often the bot runner re-reads active candidates and health-checks running bots.
+# With REDIS_URL set, the API also publishes candidate changes (utils.cache), so the runner
+# reacts to those immediately and only needs the slower safety-net poll.
+BOT_CANDIDATE_POLL_SEC = max(1, int((os.getenv("BOT_CANDIDATE_POLL_SEC") or "10").strip() or "10"))
+BOT_CANDIDATE_EVENT_POLL_SEC = max(1, int((os.getenv("BOT_CANDIDATE_EVENT_POLL_SEC") or "60").strip() or "60"))
+
+# How long a user's bot conversation state (menu position, half-filled forms) is kept in
+# Redis after their last change, so it survives bot restarts. Needs REDIS_URL; 0 keeps the
+# state in process memory only.
+BOT_USER_STATE_TTL_SEC = int((os.getenv("BOT_USER_STATE_TTL_SEC") or "86400").strip() or "86400")
+if BOT_USER_STATE_TTL_SEC < 0:
+    BOT_USER_STATE_TTL_SEC = 0
+
+# HTTP version for Telegram Bot API calls. HTTP/2 multiplexes concurrent replies over
+# one TLS connection; it needs the optional `h2` package and falls back to 1.1 without it.
+_TELEGRAM_HTTP_VERSION_RAW = (os.getenv("TELEGRAM_HTTP_VERSION") or "2").strip()
+TELEGRAM_HTTP_VERSION = "2" if _TELEGRAM_HTTP_VERSION_RAW in {"2", "2.0"} and find_spec("h2") is not None else "1.1"
+
+# Queue outgoing Bot API calls under Telegram's limits (~30 msg/s per bot, 20 msg/min per
+# group) instead of bursting into 429 flood waits. Needs the optional `aiolimiter` package
+# (python-telegram-bot[rate-limiter]); without it calls are sent unthrottled as before.
+TELEGRAM_RATE_LIMIT = (os.getenv("TELEGRAM_RATE_LIMIT") or "1").strip().lower() in {"1", "true", "yes", "y", "on"}
+TELEGRAM_RATE_LIMIT = TELEGRAM_RATE_LIMIT and find_spec("aiolimiter") is not None
+
 # Notify admin when a new BOT_REQUEST is submitted.
 # NOTE: Telegram bots can only message users who have started that bot.
 BOT_NOTIFY_ADMIN_USERNAME = (os.getenv("BOT_NOTIFY_ADMIN_USERNAME") or "mrFarzadMdi").lstrip("@").strip()
@@ -35,6 +35,17 @@ def candidate_constituency(candidate: dict) -> str:
     return province or city
 
 
+def _as_lines(v) -> list[str]:
+    if v is None:
+        return []
+    if isinstance(v, list):
+        return [t for x in v if (t := normalize_text(x))]
+    if isinstance(v, str):
+        return [t for line in v.splitlines() if (t := line.strip())]
+    t = normalize_text(v)
+    return [t] if t else []
+
+
 def format_structured_resume(candidate: dict) -> str:
     bot_config = _coerce_bot_config(candidate)
     structured = bot_config.get("structured_resume")
@@ -46,19 +57,10 @@ def format_structured_resume(candidate: dict) -> str:
 
         highlights = structured.get("highlights")
         if isinstance(highlights, list) and highlights:
-            items = [f"• {normalize_text(x)}" for x in highlights if normalize_text(x)]
+            items = [f"• {t}" for x in highlights if (t := normalize_text(x))]
             if items:
                 parts.append("\n".join(items))
 
-        def _as_lines(v) -> list[str]:
-            if v is None:
-                return []
-            if isinstance(v, list):
-                return [normalize_text(x) for x in v if normalize_text(x)]
-            if isinstance(v, str):
-                return [s.strip() for s in v.splitlines() if s.strip()]
-            return [normalize_text(v)] if normalize_text(v) else []
-
         education_items = _as_lines(structured.get("education"))
         if education_items:
             parts.append("\nتحصیلات:\n" + "\n".join([f"• {x}" for x in education_items]))
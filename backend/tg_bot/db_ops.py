@@ -1,18 +1,44 @@
 import asyncio
+import json
 import logging
 import os
-from datetime import datetime, timezone
+from datetime import datetime
+from functools import partial
 
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, func, insert, or_, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, raiseload, scoped_session, sessionmaker
 
-from database import SessionLocal
-from models import User, BotUser, BotSubmission, BotUserRegistry
+from database import engine
+from models import User, BotUser, BotSubmission, BotUserRegistry, BotCommitment
+from utils.cache import MemoryCache, cache_get_json, cache_set_json, candidate_cache_key, invalidate_candidate_cache
+from utils.text_hash import question_text_hash
+
+from .config import BOT_CANDIDATE_CACHE_TTL_SEC
 
 logger = logging.getLogger(__name__)
 
+# Dialects with INSERT .. ON CONFLICT DO UPDATE; others fall back to UPDATE-then-INSERT.
+_UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+# One Session object per worker thread of the bot's default executor. Helpers still call
+# close() after each operation, which resets it (connection back to the pool, identity map
+# cleared) but keeps the object for the next call on that thread instead of building a new one.
+# Bot helpers only read attributes of rows they just wrote, so they skip the reload-after-commit;
+# the API keeps SessionLocal's default expire_on_commit for endpoints that re-query after a commit.
+_BotSession = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+thread_session = scoped_session(_BotSession)
+
 
 async def run_db_query(func, *args, **kwargs):
-    return await asyncio.to_thread(func, *args, **kwargs)
+    # Straight to the default executor (sized by BOT_DB_THREADS in runner.main): the DB
+    # helpers don't read contextvars, so skip the context copy asyncio.to_thread() does per call.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, partial(func, *args, **kwargs))
 
 
 def save_submission_sync(
@@ -28,109 +54,367 @@ def save_submission_sync(
     constituency: str | None = None,
     status: str | None = None,
     is_public: bool | None = None,
+    completes_flow: str | None = None,
 ) -> int:
-    db = SessionLocal()
+    """Insert a BotSubmission and return its id.
+
+    `completes_flow` (e.g. "question") also counts that flow's flow_completed event in the
+    same transaction, so the submission and its counter cost one commit instead of two.
+    """
+    values = dict(
+        candidate_id=candidate_id,
+        telegram_user_id=str(telegram_user_id),
+        telegram_username=telegram_username,
+        type=submission_type,
+        topic=topic,
+        text=text,
+        constituency=constituency,
+        requester_full_name=requester_full_name,
+        requester_contact=requester_contact,
+    )
+    if status is not None:
+        values["status"] = str(status).strip()
+    if is_public is not None:
+        values["is_public"] = bool(is_public)
+    if submission_type == "QUESTION":
+        values["text_hash"] = question_text_hash(text)
+    # Core INSERT: column defaults still apply and the new id comes back with the statement
+    # (RETURNING or lastrowid), without ORM unit-of-work bookkeeping for a write-only row.
+    counted = True
+    with engine.begin() as conn:
+        submission_id = conn.execute(insert(BotSubmission).values(**values)).inserted_primary_key[0]
+        if completes_flow:
+            from .monitoring import track_flow_event_in_transaction
+
+            counted = track_flow_event_in_transaction(
+                conn, candidate_id=int(candidate_id), flow_type=completes_flow, event="flow_completed"
+            )
+    if not counted:
+        from .monitoring import track_flow_event_sync
+
+        track_flow_event_sync(candidate_id=int(candidate_id), flow_type=completes_flow, event="flow_completed")
+    return submission_id
+
+
+# Read-only lookups on the per-update path select plain columns through Core:
+# no identity map or instrumented objects for rows that are only read once.
+_CANDIDATE_SNAPSHOT_COLS = (
+    User.full_name,
+    User.bot_name,
+    User.slogan,
+    User.city,
+    User.province,
+    User.constituency,
+)
+_CANDIDATE_PROFILE_COLS = _CANDIDATE_SNAPSHOT_COLS + (
+    User.resume,
+    User.ideas,
+    User.address,
+    User.phone,
+    User.socials,
+    User.bot_config,
+    User.image_url,
+    User.voice_url,
+)
+_PUBLIC_ANSWER_COLS = (
+    BotSubmission.text,
+    BotSubmission.answer,
+    BotSubmission.topic,
+    BotSubmission.tag,
+    BotSubmission.is_featured,
+    BotSubmission.answered_at,
+)
+
+
+# Candidate profiles are read on every update but change rarely. They go through the shared
+# JSON cache (Redis when REDIS_URL is set, so API edits can invalidate them; in-process
+# otherwise). Misses only cost a duplicate SELECT, so no stampede lock.
+def _fetch_candidate(candidate_id: int, cols, kind: str, prepare=None) -> dict | None:
+    key = candidate_cache_key(kind, candidate_id)
+    data = cache_get_json(key)
+    if data is not None:
+        # Decoded fresh on every hit, so handlers can normalize socials/bot_config in place.
+        return data
+    stmt = select(*cols).where(User.id == int(candidate_id), User.role == "CANDIDATE")
+    with engine.connect() as conn:
+        row = conn.execute(stmt).mappings().first()
+    if row is None:
+        return None
+    data = dict(row)
+    data["name"] = data["full_name"]
+    if prepare is not None:
+        prepare(data)
     try:
-        submission = BotSubmission(
-            candidate_id=candidate_id,
-            telegram_user_id=str(telegram_user_id),
-            telegram_username=telegram_username,
-            type=submission_type,
-            topic=topic,
-            text=text,
-            constituency=constituency,
-            requester_full_name=requester_full_name,
-            requester_contact=requester_contact,
+        cache_set_json(key, data, BOT_CANDIDATE_CACHE_TTL_SEC)
+    except (TypeError, ValueError):
+        # LooseJSON columns that don't round-trip through json; serve uncached.
+        pass
+    return data
+
+
+def candidate_snapshot(candidate: User) -> dict:
+    """The get_candidate_sync() dict built from an already-loaded User row."""
+    data = {col.key: getattr(candidate, col.key, None) for col in _CANDIDATE_SNAPSHOT_COLS}
+    data["name"] = data["full_name"]
+    return data
+
+
+def get_candidate_sync(candidate_id: int) -> dict | None:
+    """Candidate identity fields used by /start and the user registry snapshot."""
+    return _fetch_candidate(candidate_id, _CANDIDATE_SNAPSHOT_COLS, "snapshot")
+
+
+def _normalize_profile(data: dict) -> None:
+    """Parse bot_config and fill the camelCase aliases the handlers read (legacy snake_case keys).
+
+    Runs once per cache fill instead of on every message.
+    """
+    bot_config = data.get("bot_config")
+    if isinstance(bot_config, str):
+        try:
+            parsed = json.loads(bot_config)
+            bot_config = parsed if isinstance(parsed, dict) else {}
+        except Exception:
+            bot_config = {}
+    elif not isinstance(bot_config, dict):
+        bot_config = {}
+    data["bot_config"] = bot_config
+
+    socials = data.get("socials")
+    if isinstance(socials, dict):
+        if "telegramChannel" not in socials and "telegram_channel" in socials:
+            socials["telegramChannel"] = socials.get("telegram_channel")
+        if "telegramGroup" not in socials and "telegram_group" in socials:
+            socials["telegramGroup"] = socials.get("telegram_group")
+
+    if "groupLockEnabled" not in bot_config and "auto_lock_enabled" in bot_config:
+        bot_config["groupLockEnabled"] = bool(bot_config.get("auto_lock_enabled"))
+    if "lockStartTime" not in bot_config and "lock_start_time" in bot_config:
+        bot_config["lockStartTime"] = bot_config.get("lock_start_time")
+    if "lockEndTime" not in bot_config and "lock_end_time" in bot_config:
+        bot_config["lockEndTime"] = bot_config.get("lock_end_time")
+    if "blockLinks" not in bot_config and "anti_link_enabled" in bot_config:
+        bot_config["blockLinks"] = bool(bot_config.get("anti_link_enabled"))
+    if "badWords" not in bot_config and "forbidden_words" in bot_config:
+        raw = bot_config.get("forbidden_words")
+        if isinstance(raw, str):
+            bot_config["badWords"] = raw.split(",")
+    bad_words = bot_config.get("badWords")
+    if isinstance(bad_words, list):
+        # Matching is case-insensitive substring search; store the words ready for it.
+        bot_config["badWords"] = [w.strip().lower() for w in bad_words if isinstance(w, str) and w.strip()]
+
+
+def get_candidate_profile_sync(candidate_id: int) -> dict | None:
+    """Everything the message handler renders (resume, socials, bot_config, media...), normalized."""
+    return _fetch_candidate(candidate_id, _CANDIDATE_PROFILE_COLS, "profile", _normalize_profile)
+
+
+def get_public_answered_submission_sync(candidate_id: int, submission_id: int, submission_type: str):
+    """Public answered QUESTION/FEEDBACK row for deep links, or None."""
+    stmt = select(*_PUBLIC_ANSWER_COLS).where(
+        BotSubmission.id == int(submission_id),
+        BotSubmission.candidate_id == int(candidate_id),
+        BotSubmission.type == submission_type,
+        BotSubmission.status == "ANSWERED",
+        BotSubmission.is_public == True,  # noqa: E712
+        BotSubmission.answer.isnot(None),
+    )
+    with engine.connect() as conn:
+        return conn.execute(stmt).first()
+
+
+def question_already_asked_sync(candidate_id: int, text: str) -> bool:
+    """Has this candidate already received a QUESTION with the same (normalized) text?"""
+    text_hash = question_text_hash(text)
+    if text_hash is None:
+        return False
+    stmt = (
+        select(BotSubmission.id)
+        .where(
+            BotSubmission.candidate_id == int(candidate_id),
+            BotSubmission.type == "QUESTION",
+            BotSubmission.text_hash == text_hash,
         )
-        if status is not None:
-            submission.status = str(status).strip()
-        if is_public is not None:
-            submission.is_public = bool(is_public)
-        db.add(submission)
-        db.commit()
-        db.refresh(submission)
-        return submission.id
-    finally:
-        db.close()
+        .limit(1)
+    )
+    with engine.connect() as conn:
+        return conn.execute(stmt).first() is not None
 
 
-def get_candidate_sync(candidate_id: int):
-    db = SessionLocal()
-    try:
-        return db.query(User).filter(User.id == candidate_id, User.role == "CANDIDATE").first()
-    finally:
-        db.close()
+def get_commitment_cards_sync(candidate_id: int, limit: int = 10) -> list[dict]:
+    """Latest commitments as plain dicts with just the fields format_commitment_card() reads.
 
+    Core select: no ORM instances and no progress_logs join.
+    """
+    stmt = (
+        select(BotCommitment.title, BotCommitment.body, BotCommitment.status, BotCommitment.created_at)
+        .where(BotCommitment.candidate_id == int(candidate_id))
+        .order_by(BotCommitment.created_at.desc())
+        .limit(int(limit))
+    )
+    with engine.connect() as conn:
+        return [
+            {
+                "title": title,
+                "body": body,
+                "status": status,
+                "created_at": created_at.isoformat() if created_at else None,
+            }
+            for title, body, status, created_at in conn.execute(stmt)
+        ]
 
-def save_bot_user_sync(user_data: dict, candidate_name: str):
-    db = SessionLocal()
-    try:
-        bot_user = db.query(BotUser).filter(BotUser.telegram_id == user_data["id"]).first()
-        if not bot_user:
-            bot_user = BotUser(
-                telegram_id=user_data["id"],
-                username=user_data.get("username"),
-                first_name=user_data.get("first_name"),
-                last_name=user_data.get("last_name"),
-                bot_name=candidate_name,
-            )
-            db.add(bot_user)
-        else:
-            bot_user.username = user_data.get("username")
-            bot_user.first_name = user_data.get("first_name")
-            bot_user.last_name = user_data.get("last_name")
-            bot_user.bot_name = candidate_name
-        db.commit()
-    except Exception as e:
-        logger.error(f"Error saving bot user: {e}")
-    finally:
-        db.close()
 
+_REGISTRY_UPDATE_COLS = (
+    "telegram_username",
+    "first_name",
+    "last_name",
+    "candidate_name",
+    "candidate_bot_name",
+    "candidate_city",
+    "candidate_province",
+    "candidate_constituency",
+    "last_seen_at",
+)
 
-def save_bot_user_registry_sync(*, user_data: dict, candidate_id: int, candidate_snapshot: dict, chat_type: str | None):
-    db = SessionLocal()
-    try:
-        row = (
-            db.query(BotUserRegistry)
-            .filter(BotUserRegistry.candidate_id == int(candidate_id), BotUserRegistry.telegram_user_id == str(user_data["id"]))
-            .first()
+
+def _upsert_bot_users(conn, rows: list[dict]) -> None:
+    # bot_users.telegram_id has no unique key to conflict on: look up which ids exist,
+    # then one executemany UPDATE for those and one executemany INSERT for the rest.
+    ids = [r["telegram_id"] for r in rows]
+    existing = set(conn.execute(select(BotUser.telegram_id).where(BotUser.telegram_id.in_(ids))).scalars())
+    updates = [
+        {"b_telegram_id": tid, **{k: v for k, v in r.items() if k != "telegram_id"}}
+        for r in rows
+        if (tid := r["telegram_id"]) in existing
+    ]
+    inserts = [r for r in rows if r["telegram_id"] not in existing]
+    if updates:
+        # SET columns come from the parameter dict keys.
+        conn.execute(update(BotUser).where(BotUser.telegram_id == bindparam("b_telegram_id")), updates)
+    if inserts:
+        conn.execute(insert(BotUser), inserts)
+
+
+def _upsert_bot_user_registry(conn, rows: list[dict]) -> None:
+    upsert_insert = _UPSERT_INSERTS.get(conn.dialect.name)
+    if upsert_insert is not None:
+        stmt = upsert_insert(BotUserRegistry)
+        set_ = {name: stmt.excluded[name] for name in _REGISTRY_UPDATE_COLS}
+        set_["chat_type"] = func.coalesce(stmt.excluded.chat_type, BotUserRegistry.chat_type)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BotUserRegistry.candidate_id, BotUserRegistry.telegram_user_id],
+            set_=set_,
         )
-        now = datetime.now(timezone.utc).replace(tzinfo=None)
-        if not row:
-            row = BotUserRegistry(
-                candidate_id=int(candidate_id),
-                telegram_user_id=str(user_data["id"]),
-                telegram_username=user_data.get("username"),
-                first_name=user_data.get("first_name"),
-                last_name=user_data.get("last_name"),
-                chat_type=chat_type,
-                candidate_name=candidate_snapshot.get("name"),
-                candidate_bot_name=candidate_snapshot.get("bot_name"),
-                candidate_city=candidate_snapshot.get("city"),
-                candidate_province=candidate_snapshot.get("province"),
-                candidate_constituency=candidate_snapshot.get("constituency"),
-                first_seen_at=now,
-                last_seen_at=now,
-            )
-            db.add(row)
-        else:
-            row.telegram_username = user_data.get("username")
-            row.first_name = user_data.get("first_name")
-            row.last_name = user_data.get("last_name")
-            row.chat_type = chat_type or row.chat_type
-
-            row.candidate_name = candidate_snapshot.get("name")
-            row.candidate_bot_name = candidate_snapshot.get("bot_name")
-            row.candidate_city = candidate_snapshot.get("city")
-            row.candidate_province = candidate_snapshot.get("province")
-            row.candidate_constituency = candidate_snapshot.get("constituency")
-            row.last_seen_at = now
+        conn.execute(stmt, rows)
+        return
 
-        db.commit()
+    for row in rows:
+        values = {name: row[name] for name in _REGISTRY_UPDATE_COLS}
+        result = conn.execute(
+            update(BotUserRegistry)
+            .where(BotUserRegistry.candidate_id == row["candidate_id"], BotUserRegistry.telegram_user_id == row["telegram_user_id"])
+            .values(**values, chat_type=func.coalesce(row["chat_type"], BotUserRegistry.chat_type))
+        )
+        if not result.rowcount:
+            conn.execute(insert(BotUserRegistry).values(**row))
+
+
+def save_bot_users_sync(entries: list[dict]) -> None:
+    """Write a batch of seen users to bot_users and bot_user_registry in one transaction.
+
+    Entries come from `_bot_user_entry()`. Later entries for the same user win,
+    except that a missing chat_type keeps the one seen earlier.
+    """
+    bot_users: dict[str, dict] = {}
+    registry: dict[tuple[int, str], dict] = {}
+    for e in entries:
+        user_data, snapshot = e["user_data"], e["candidate_snapshot"]
+        telegram_id = str(user_data["id"])
+        bot_users[telegram_id] = {
+            "telegram_id": telegram_id,
+            "username": user_data.get("username"),
+            "first_name": user_data.get("first_name"),
+            "last_name": user_data.get("last_name"),
+            "bot_name": str(snapshot.get("bot_name") or snapshot.get("name") or ""),
+        }
+        key = (e["candidate_id"], telegram_id)
+        prev = registry.get(key)
+        registry[key] = {
+            "candidate_id": key[0],
+            "telegram_user_id": telegram_id,
+            "telegram_username": user_data.get("username"),
+            "first_name": user_data.get("first_name"),
+            "last_name": user_data.get("last_name"),
+            "chat_type": e["chat_type"] or (prev["chat_type"] if prev else None),
+            "candidate_name": snapshot.get("name"),
+            "candidate_bot_name": snapshot.get("bot_name"),
+            "candidate_city": snapshot.get("city"),
+            "candidate_province": snapshot.get("province"),
+            "candidate_constituency": snapshot.get("constituency"),
+            "first_seen_at": prev["first_seen_at"] if prev else e["seen_at"],
+            "last_seen_at": e["seen_at"],
+        }
+    try:
+        with engine.begin() as conn:
+            _upsert_bot_users(conn, list(bot_users.values()))
+            _upsert_bot_user_registry(conn, list(registry.values()))
     except Exception as e:
-        logger.error(f"Error saving bot user registry: {e}")
+        logger.error("Error saving bot users: %s", e)
+
+
+def _bot_user_entry(*, user_data: dict, candidate_id: int, candidate_snapshot: dict, chat_type: str | None) -> dict:
+    return {
+        "user_data": user_data,
+        "candidate_id": int(candidate_id),
+        "candidate_snapshot": candidate_snapshot,
+        "chat_type": chat_type,
+        "seen_at": datetime.utcnow(),
+    }
+
+
+# Set while bot_user_writer() runs; save_bot_user then enqueues instead of writing inline.
+_bot_user_queue: asyncio.Queue | None = None
+_BOT_USER_FLUSH_INTERVAL_SEC = 0.25
+_BOT_USER_FLUSH_MAX_BATCH = 500
+# If the DB falls behind, drop the oldest entries rather than grow without bound; a dropped
+# entry only delays a last-seen/registry update until that user's next message.
+_BOT_USER_QUEUE_MAX = 10_000
+
+
+async def bot_user_writer() -> None:
+    """Coalesce save_bot_user calls and flush them every ~250 ms in one transaction.
+
+    Bursts of updates cost one commit per flush instead of one per update, at the
+    price of up to one interval of write latency. Pending entries are flushed on exit.
+    """
+    global _bot_user_queue
+    queue: asyncio.Queue = asyncio.Queue()
+    _bot_user_queue = queue
+    batch: list = []
+    flushing = None
+    try:
+        while True:
+            batch.append(await queue.get())
+            await asyncio.sleep(_BOT_USER_FLUSH_INTERVAL_SEC)
+            while len(batch) < _BOT_USER_FLUSH_MAX_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
+            # Shielded so a cancel during the write lets it finish instead of repeating it below.
+            flushing = asyncio.ensure_future(run_db_query(save_bot_users_sync, batch))
+            await asyncio.shield(flushing)
+            batch = []
+            flushing = None
     finally:
-        db.close()
+        _bot_user_queue = None
+        if flushing is not None:
+            # Cancelled while (or right after) writing this batch: it is covered by that write.
+            if not flushing.done():
+                await asyncio.wait([flushing])
+            batch = []
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        if batch:
+            save_bot_users_sync(batch)
 
 
 async def save_bot_user(update, *, candidate_id: int, candidate_snapshot: dict):
@@ -145,58 +429,152 @@ async def save_bot_user(update, *, candidate_id: int, candidate_snapshot: dict):
         "last_name": user.last_name,
     }
 
-    candidate_name = str(candidate_snapshot.get("bot_name") or candidate_snapshot.get("name") or "")
     chat_type = update.effective_chat.type if update.effective_chat else None
 
-    await run_db_query(save_bot_user_sync, user_data, candidate_name)
-    await run_db_query(
-        save_bot_user_registry_sync,
+    entry = _bot_user_entry(
         user_data=user_data,
-        candidate_id=int(candidate_id),
+        candidate_id=candidate_id,
         candidate_snapshot=candidate_snapshot,
         chat_type=chat_type,
     )
+    queue = _bot_user_queue
+    if queue is not None:
+        if queue.qsize() >= _BOT_USER_QUEUE_MAX:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(entry)
+        return
+    await run_db_query(save_bot_users_sync, [entry])
 
 
 def looks_like_telegram_token(token: str | None) -> bool:
     if not token:
         return False
     token = token.strip()
-    if not token or token.startswith("TOKEN_"):
-        return False
-    if ":" not in token:
+    # Shortest valid shape is "<digit>:<20 chars>"; reject obvious junk before splitting.
+    if len(token) < 22 or ":" not in token or token.startswith("TOKEN_"):
         return False
     bot_id, secret = token.split(":", 1)
     return bot_id.isdigit() and len(secret) >= 20
 
 
+_LOCALHOST_UPLOAD_PREFIXES = (
+    "http://localhost:8000/uploads/",
+    "http://127.0.0.1:8000/uploads/",
+)
+_UPLOADS_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "uploads"))
+
+# Media buttons resolve the same few files over and over; remember stat() results briefly
+# so a replaced/deleted upload is picked up within seconds.
+_upload_exists_cache = MemoryCache(maxsize=512)
+_UPLOAD_EXISTS_TTL_SEC = 10
+
+
 def upload_file_path_from_localhost_url(url: str | None) -> str | None:
     if not url or not isinstance(url, str):
         return None
     url = url.strip()
-    if not url:
-        return None
-    prefixes = (
-        "http://localhost:8000/uploads/",
-        "http://127.0.0.1:8000/uploads/",
-    )
-    if not url.startswith(prefixes):
+    if not url.startswith(_LOCALHOST_UPLOAD_PREFIXES):
         return None
     filename = url.split("/uploads/", 1)[-1]
     filename = filename.split("?", 1)[0].split("#", 1)[0]
     filename = filename.replace("..", "").lstrip("/\\")
-    local_path = os.path.join(os.path.dirname(__file__), "..", "uploads", filename)
-    local_path = os.path.normpath(local_path)
-    return local_path if os.path.exists(local_path) else None
+    local_path = os.path.normpath(os.path.join(_UPLOADS_DIR, filename))
+    exists = _upload_exists_cache.get(local_path)
+    if exists is None:
+        exists = os.path.exists(local_path)
+        _upload_exists_cache.set(local_path, exists, _UPLOAD_EXISTS_TTL_SEC)
+    return local_path if exists else None
+
+
+# Resolved admin notification targets (username -> chat id). Only hits are cached: an admin who
+# hasn't started the bot yet should be picked up on the next request, not an hour later.
+_admin_chat_id_cache = MemoryCache(maxsize=16)
+_ADMIN_CHAT_ID_TTL_SEC = 3600
+
+
+def resolve_chat_id_by_username_sync(username: str) -> str | None:
+    """Most recently seen registry chat id for a Telegram username (any candidate's bot)."""
+    uname = (username or "").lstrip("@").strip().lower()
+    if not uname:
+        return None
+    chat_id = _admin_chat_id_cache.get(uname)
+    if chat_id is not None:
+        return chat_id
+    stmt = (
+        select(BotUserRegistry.telegram_user_id)
+        .where(
+            or_(
+                func.lower(BotUserRegistry.telegram_username) == uname,
+                func.lower(BotUserRegistry.telegram_username) == f"@{uname}",
+            )
+        )
+        .order_by(BotUserRegistry.last_seen_at.desc())
+        .limit(1)
+    )
+    with engine.connect() as conn:
+        chat_id = conn.execute(stmt).scalar()
+    if not chat_id:
+        return None
+    chat_id = str(chat_id)
+    _admin_chat_id_cache.set(uname, chat_id, _ADMIN_CHAT_ID_TTL_SEC)
+    return chat_id
+
+
+def group_chat_id_is_current(socials, chat_id_int: int) -> bool:
+    """True when `socials` already records `chat_id_int` under both key spellings (nothing to persist)."""
+    return (
+        isinstance(socials, dict)
+        and socials.get("telegram_group_chat_id") == chat_id_int
+        and socials.get("telegramGroupChatId") == chat_id_int
+    )
+
+
+# One-statement JSON patch of users.socials (stored as TEXT, see models.LooseJSON). Rows whose
+# socials isn't a JSON object, or legacy text that the DB can't parse, fall back to the ORM merge.
+_SOCIALS_GROUP_CHAT_ID_PATCH = {
+    "sqlite": (
+        "UPDATE users SET socials = json_set(COALESCE(NULLIF(socials, ''), '{}'), "
+        "'$.telegram_group_chat_id', :chat_id, '$.telegramGroupChatId', :chat_id) "
+        "WHERE id = :uid AND role = 'CANDIDATE' "
+        "AND (socials IS NULL OR socials = '' OR json_type(socials) = 'object')"
+    ),
+    "postgresql": (
+        "UPDATE users SET socials = (COALESCE(NULLIF(socials, ''), '{}')::jsonb || jsonb_build_object("
+        "'telegram_group_chat_id', CAST(:chat_id AS bigint), 'telegramGroupChatId', CAST(:chat_id AS bigint)))::text "
+        "WHERE id = :uid AND role = 'CANDIDATE' "
+        "AND (socials IS NULL OR socials = '' OR jsonb_typeof(socials::jsonb) = 'object')"
+    ),
+}
 
 
 def persist_group_chat_id_sync(candidate_id: int, chat_id_int: int) -> None:
-    db = SessionLocal()
+    patch_sql = _SOCIALS_GROUP_CHAT_ID_PATCH.get(engine.dialect.name)
+    if patch_sql is not None:
+        try:
+            with engine.begin() as conn:
+                updated = conn.execute(text(patch_sql), {"chat_id": int(chat_id_int), "uid": int(candidate_id)}).rowcount
+            if updated:
+                invalidate_candidate_cache(candidate_id)
+                return
+        except Exception:
+            logger.debug("socials JSON patch failed; falling back to ORM merge", exc_info=True)
+
+    db = thread_session()
     try:
-        u = db.query(User).filter(User.id == int(candidate_id), User.role == "CANDIDATE").first()
+        u = (
+            db.query(User)
+            .options(raiseload("*"))
+            .filter(User.id == int(candidate_id), User.role == "CANDIDATE")
+            .first()
+        )
         if not u:
             return
         base = u.socials if isinstance(u.socials, dict) else {}
+        if group_chat_id_is_current(base, chat_id_int):
+            return
         s = dict(base)
         if s.get("telegram_group_chat_id") != chat_id_int:
             s["telegram_group_chat_id"] = chat_id_int
@@ -205,5 +583,6 @@ def persist_group_chat_id_sync(candidate_id: int, chat_id_int: int) -> None:
         u.socials = s
         db.add(u)
         db.commit()
+        invalidate_candidate_cache(candidate_id)
     finally:
         db.close()
@@ -1,21 +1,39 @@
+import asyncio
 import logging
 import html
 import os
 import re
 import json
-from datetime import datetime, timedelta, timezone
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
 
-from sqlalchemy import func, or_
-from telegram import KeyboardButton, ReplyKeyboardMarkup, Update
+from sqlalchemy import or_, select
+from telegram import Update
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
 import models
-from database import SessionLocal
-from models import BotSubmission, BotUserRegistry, User
+from models import BotSubmission
+from utils.cache import cache_get_json, cache_set_json
 
 from .config import BOT_NOTIFY_ADMIN_CHAT_ID, BOT_NOTIFY_ADMIN_USERNAME
 from .content import candidate_constituency, format_structured_resume, get_program_answer
-from .db_ops import persist_group_chat_id_sync, run_db_query, save_bot_user, save_submission_sync, upload_file_path_from_localhost_url
+from .db_ops import (
+    get_candidate_profile_sync,
+    get_candidate_sync,
+    get_commitment_cards_sync,
+    get_public_answered_submission_sync,
+    group_chat_id_is_current,
+    persist_group_chat_id_sync,
+    question_already_asked_sync,
+    resolve_chat_id_by_username_sync,
+    run_db_query,
+    save_bot_user,
+    save_submission_sync,
+    thread_session,
+    upload_file_path_from_localhost_url,
+)
 from .keyboards import (
     build_about_keyboard,
     build_back_keyboard,
@@ -24,18 +42,21 @@ from .keyboards import (
     build_bot_request_role_keyboard,
     build_main_keyboard,
     build_other_keyboard,
+    build_profile_summary_keyboard,
+    build_programs_keyboard,
     build_question_ask_entry_keyboard,
     build_question_categories_keyboard,
     build_question_entry_keyboard,
     build_question_hub_keyboard,
     build_question_view_method_keyboard,
 )
-from .monitoring import log_technical_error_sync, log_ux_sync, track_flow_event_sync, track_path_sync
+from .monitoring import log_technical_error, log_ux, track_flow_event
 from .text_utils import (
     btn_eq,
     btn_has,
     build_feedback_confirmation_text,
     build_feedback_intro_text,
+    format_commitment_card,
     format_public_question_answer_block,
     format_public_feedback_answer_block,
     normalize_button_text,
@@ -105,13 +126,246 @@ from .ui_constants import (
     parse_question_list_choice,
 )
 
+# /start payloads from deep links: t.me/<bot>?start=question_<id> / feedback_<id>
+_QUESTION_DEEPLINK_RE = re.compile(r"question_(\d+)")
+_FEEDBACK_DEEPLINK_RE = re.compile(r"feedback_(\d+)")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Group moderation (bot_config.blockLinks): any http(s) URL.
+_URL_RE = re.compile(r"https?://\S+")
+_CHAT_ID_RE = re.compile(r"-?\d+")
+# Programs menu: "3)", "3", or a richer label like "3) 🧾 شفافیت".
+_PROGRAM_CHOICE_PAREN_RE = re.compile(r"^(\d{1,2})\s*\)")
+_PROGRAM_CHOICE_NUMBER_RE = re.compile(r"\d{1,2}")
+_PROGRAM_CHOICE_LABEL_RE = re.compile(r"^(\d{1,2})\D+")
+_NEWLINES_RE = re.compile(r"\r\n?")
+_SLOGAN_BULLET_RE = re.compile(r"^[-•●▪▫✅🟢🔰✨\s]+")
+
+# Membership sets checked on every message; built once instead of per call.
+_GROUP_CHAT_TYPES = frozenset({"group", "supergroup"})
+_MENU_STATES = frozenset({STATE_MAIN, STATE_ABOUT_MENU, STATE_OTHER_MENU})
+_ABOUT_STATES = frozenset({STATE_ABOUT_MENU, STATE_ABOUT_DETAIL})
+_KNOWN_STATES = frozenset({
+    STATE_MAIN,
+    STATE_ABOUT_MENU,
+    STATE_ABOUT_DETAIL,
+    STATE_OTHER_MENU,
+    STATE_COMMITMENTS_VIEW,
+    STATE_PROGRAMS,
+    STATE_FEEDBACK_TEXT,
+    STATE_QUESTION_TEXT,
+    STATE_QUESTION_MENU,
+    STATE_QUESTION_SEARCH,
+    STATE_QUESTION_CATEGORY,
+    STATE_QUESTION_ENTRY,
+    STATE_QUESTION_VIEW_METHOD,
+    STATE_QUESTION_VIEW_CATEGORY,
+    STATE_QUESTION_VIEW_LIST,
+    STATE_QUESTION_VIEW_ANSWER,
+    STATE_QUESTION_VIEW_RESULTS,
+    STATE_QUESTION_VIEW_SEARCH_TEXT,
+    STATE_QUESTION_ASK_ENTRY,
+    STATE_QUESTION_ASK_TOPIC,
+    STATE_QUESTION_ASK_TEXT,
+    STATE_BOTREQ_NAME,
+    STATE_BOTREQ_ROLE,
+    STATE_BOTREQ_CONSTITUENCY,
+    STATE_BOTREQ_CONTACT,
+})
+_QUESTION_STEP_STATES = frozenset({
+    STATE_QUESTION_ENTRY,
+    STATE_QUESTION_VIEW_METHOD,
+    STATE_QUESTION_VIEW_CATEGORY,
+    STATE_QUESTION_VIEW_LIST,
+    STATE_QUESTION_VIEW_ANSWER,
+    STATE_QUESTION_VIEW_RESULTS,
+    STATE_QUESTION_VIEW_SEARCH_TEXT,
+    STATE_QUESTION_ASK_ENTRY,
+    STATE_QUESTION_ASK_TOPIC,
+    STATE_QUESTION_ASK_TEXT,
+})
+_BOTREQ_NAME_RESERVED = frozenset({
+    BTN_QUESTION,
+    BTN_COMMITMENTS,
+    BTN_FEEDBACK,
+    BTN_FEEDBACK_LEGACY,
+    BTN_ABOUT_MENU,
+    BTN_OTHER_MENU,
+    BTN_ABOUT_INTRO,
+    BTN_PROGRAMS,
+    BTN_HQ_ADDRESSES,
+    BTN_VOICE_INTRO,
+    BTN_BUILD_BOT,
+    BTN_ABOUT_BOT,
+    BTN_CONTACT,
+    BTN_INTRO,
+    BTN_BOT_REQUEST,
+})
+_ROLES_ALLOWED = frozenset({ROLE_REPRESENTATIVE, ROLE_CANDIDATE, ROLE_TEAM})
+_FEEDBACK_TEXT_RESERVED = frozenset(
+    {BTN_INTRO, BTN_PROGRAMS, BTN_FEEDBACK, BTN_FEEDBACK_LEGACY, BTN_QUESTION, BTN_CONTACT, BTN_BUILD_BOT}
+)
+
+# user_data keys of the bot-request flow; "back" also drops the pending feedback topic.
+_BOTREQ_KEYS = ("botreq_full_name", "botreq_role", "botreq_constituency", "botreq_contact")
+_BACK_CLEAR_KEYS = ("feedback_topic",) + _BOTREQ_KEYS
+# Columns the "answers by category" cards read; fetched as plain rows.
+_CATEGORY_ANSWER_COLS = (
+    BotSubmission.id,
+    BotSubmission.text,
+    BotSubmission.answer,
+    BotSubmission.topic,
+    BotSubmission.answered_at,
+)
+
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=256)
+def _lock_window(start_time, end_time):
+    """Parsed (start, end) of bot_config's group lock window; None (logged once) if malformed."""
+    try:
+        return datetime.strptime(start_time, "%H:%M").time(), datetime.strptime(end_time, "%H:%M").time()
+    except ValueError:
+        logger.error("Invalid time format in bot_config")
+        return None
+
+
+@lru_cache(maxsize=256)
+def _bad_words_re(words: tuple[str, ...]) -> re.Pattern | None:
+    """One alternation per badWords list (already stripped/lowercased by the profile loader),
+    longest first, so a message is scanned once."""
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(w) for w in sorted(set(words), key=len, reverse=True)))
+
+
+def _read_file_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def _reply_media(context, message, kind: str, url: str, **kwargs):
+    """message.reply_<kind>(url) that re-sends Telegram's file_id after the first upload.
+
+    file_ids are per bot, so they live in bot_data keyed by (kind, url); a changed upload
+    gets a new URL and therefore a fresh upload. Local uploads are read from disk only on a miss,
+    in the default executor so a large voice file doesn't stall the event loop.
+    """
+    file_ids = context.bot_data.setdefault("file_ids", {})
+    key = (kind, url)
+    send = getattr(message, f"reply_{kind}")
+    file_id = file_ids.get(key)
+    if file_id:
+        try:
+            return await send(file_id, **kwargs)
+        except BadRequest:
+            file_ids.pop(key, None)
+
+    local_path = upload_file_path_from_localhost_url(url)
+    if local_path:
+        data = await asyncio.get_running_loop().run_in_executor(None, _read_file_bytes, local_path)
+        kwargs.setdefault("filename", os.path.basename(local_path))
+        sent = await send(data, **kwargs)
+    else:
+        sent = await send(url, **kwargs)
+
+    media = getattr(sent, kind, None)
+    if kind == "photo":
+        media = media[-1] if media else None
+    if media is not None and getattr(media, "file_id", None):
+        file_ids[key] = media.file_id
+    return sent
+
+
+def _admin_chat_id(value) -> str | None:
+    v = (str(value).strip() if value is not None else "")
+    return v if _CHAT_ID_RE.fullmatch(v) else None
+
+
+async def _notify_admins_of_bot_request(bot, *, submission_id, formatted: str, candidate: dict, origin_chat_id) -> None:
+    try:
+        admin_chat_ids: list[str] = []
+        fixed_id = _admin_chat_id(BOT_NOTIFY_ADMIN_CHAT_ID)
+        if fixed_id:
+            admin_chat_ids.append(fixed_id)
+
+        if BOT_NOTIFY_ADMIN_USERNAME:
+            resolved_id = _admin_chat_id(await run_db_query(resolve_chat_id_by_username_sync, BOT_NOTIFY_ADMIN_USERNAME))
+            if resolved_id and resolved_id not in admin_chat_ids:
+                admin_chat_ids.append(resolved_id)
+
+        if not admin_chat_ids:
+            logger.warning("BOT_REQUEST admin notify skipped: no admin chat id resolved")
+            return
+
+        cand_name = normalize_text(candidate.get("full_name") or candidate.get("name") or "")
+        cand_bot = normalize_text(candidate.get("bot_name") or "")
+        header = f"📌 ثبت درخواست مشاوره (کد: {submission_id})"
+        source = f"از بات: {cand_name} (@{cand_bot})" if cand_bot else f"از بات: {cand_name}"
+        msg = "\n".join([x for x in [header, source, formatted] if x]).strip()
+        for cid in admin_chat_ids:
+            # Don't echo the admin notification back into the same chat where the requester is talking to the bot.
+            if origin_chat_id is not None and str(origin_chat_id) == str(cid):
+                continue
+            await bot.send_message(chat_id=int(cid), text=msg)
+    except Exception:
+        logger.exception("Failed to notify admin of BOT_REQUEST")
+
+
+def _addressed_to_bot(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+    """Group message that replies to or @mentions this bot."""
+    msg = update.message
+    reply_to = getattr(msg, "reply_to_message", None)
+    if reply_to is not None and reply_to.from_user is not None and reply_to.from_user.id == context.bot.id:
+        return True
+    try:
+        username = context.bot.username
+    except Exception:
+        return False
+    return bool(username) and f"@{username.lower()}" in (msg.text or "").lower()
+
+
+@lru_cache(maxsize=1)
+def _menu_button_texts() -> frozenset[str]:
+    """Normalized label of every button on the bot's fixed reply keyboards."""
+    keyboards = (
+        build_main_keyboard(),
+        build_about_keyboard(),
+        build_other_keyboard(),
+        build_back_keyboard(),
+        build_profile_summary_keyboard(),
+        build_programs_keyboard(),
+        build_question_hub_keyboard(),
+        build_question_entry_keyboard(),
+        build_question_view_method_keyboard(),
+        build_question_ask_entry_keyboard(),
+        build_question_categories_keyboard(prefix_icon=True, include_back=True),
+        build_question_categories_keyboard(prefix_icon=False, include_back=True),
+        build_bot_request_cta_keyboard(),
+        build_bot_request_role_keyboard(),
+        build_bot_request_contact_keyboard(),
+    )
+    labels = {button.text for keyboard in keyboards for row in keyboard.keyboard for button in row}
+    labels.add(BTN_FEEDBACK_LEGACY)
+    return frozenset(normalize_button_text(label) for label in labels)
+
+
+_BACK_BUTTON_NORMALIZED = normalize_button_text(BTN_BACK)
+
+
 def _is_back(text: str | None) -> bool:
     # Match exact + Persian keywords.
     t = normalize_button_text(text)
-    return t == normalize_button_text(BTN_BACK) or ("بازگشت" in t or "برگشت" in t)
+    return t == _BACK_BUTTON_NORMALIZED or ("بازگشت" in t or "برگشت" in t)
+
+
+def _leave_to_return_menu(user_data: dict):
+    """Pop `_return_state`, switch back to OTHER or MAIN and return that menu's (cached) keyboard."""
+    if user_data.pop("_return_state", None) == STATE_OTHER_MENU:
+        user_data["state"] = STATE_OTHER_MENU
+        return build_other_keyboard()
+    user_data["state"] = STATE_MAIN
+    return build_main_keyboard()
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -126,25 +380,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await safe_reply_text(msg, "خطا: شناسه کاندیدا یافت نشد.")
         return
 
-    def get_candidate_data(cid):
-        db = SessionLocal()
-        try:
-            c = db.query(User).filter(User.id == cid, User.role == "CANDIDATE").first()
-            if not c:
-                return None
-            return {
-                "name": c.full_name,
-                "full_name": c.full_name,
-                "bot_name": c.bot_name,
-                "slogan": c.slogan,
-                "city": getattr(c, "city", None),
-                "province": getattr(c, "province", None),
-                "constituency": getattr(c, "constituency", None),
-            }
-        finally:
-            db.close()
-
-    candidate = await run_db_query(get_candidate_data, candidate_id)
+    candidate = context.bot_data.get("candidate") or await run_db_query(get_candidate_sync, candidate_id)
     if not candidate:
         msg = update.effective_message
         if msg:
@@ -153,7 +389,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         if update.effective_user is not None:
-            log_ux_sync(
+            await log_ux(
                 candidate_id=int(candidate_id),
                 telegram_user_id=str(update.effective_user.id),
                 state=context.user_data.get("state") or STATE_MAIN,
@@ -167,29 +403,11 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         args = list(getattr(context, "args", None) or [])
         if args:
-            m = re.fullmatch(r"question_(\d+)", str(args[0]).strip())
+            m = _QUESTION_DEEPLINK_RE.fullmatch(str(args[0]).strip())
             if m:
                 qid = int(m.group(1))
 
-                def _get_public_answered_by_id(cid: int, submission_id: int) -> BotSubmission | None:
-                    db = SessionLocal()
-                    try:
-                        return (
-                            db.query(BotSubmission)
-                            .filter(
-                                BotSubmission.id == int(submission_id),
-                                BotSubmission.candidate_id == int(cid),
-                                BotSubmission.type == "QUESTION",
-                                BotSubmission.status == "ANSWERED",
-                                BotSubmission.is_public == True,  # noqa: E712
-                                BotSubmission.answer.isnot(None),
-                            )
-                            .first()
-                        )
-                    finally:
-                        db.close()
-
-                row = await run_db_query(_get_public_answered_by_id, candidate_id, qid)
+                row = await run_db_query(get_public_answered_submission_sync, candidate_id, qid, "QUESTION")
                 msg = update.effective_message
                 if not msg:
                     return
@@ -213,29 +431,11 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 await safe_reply_text(msg, block, reply_markup=build_question_hub_keyboard())
                 return
 
-            m2 = re.fullmatch(r"feedback_(\d+)", str(args[0]).strip())
+            m2 = _FEEDBACK_DEEPLINK_RE.fullmatch(str(args[0]).strip())
             if m2:
                 fid = int(m2.group(1))
 
-                def _get_public_answered_feedback_by_id(cid: int, submission_id: int) -> BotSubmission | None:
-                    db = SessionLocal()
-                    try:
-                        return (
-                            db.query(BotSubmission)
-                            .filter(
-                                BotSubmission.id == int(submission_id),
-                                BotSubmission.candidate_id == int(cid),
-                                BotSubmission.type == "FEEDBACK",
-                                BotSubmission.status == "ANSWERED",
-                                BotSubmission.is_public == True,  # noqa: E712
-                                BotSubmission.answer.isnot(None),
-                            )
-                            .first()
-                        )
-                    finally:
-                        db.close()
-
-                row2 = await run_db_query(_get_public_answered_feedback_by_id, candidate_id, fid)
+                row2 = await run_db_query(get_public_answered_submission_sync, candidate_id, fid, "FEEDBACK")
                 msg2 = update.effective_message
                 if not msg2:
                     return
@@ -312,7 +512,7 @@ async def chatid_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await safe_reply_text(msg, "خطا: شناسه کاندیدا یافت نشد.")
         return
 
-    if chat.type not in ["group", "supergroup"]:
+    if chat.type not in _GROUP_CHAT_TYPES:
         await safe_reply_text(msg, "این دستور فقط داخل گروه قابل استفاده است.")
         return
 
@@ -350,6 +550,10 @@ async def debug_update_logger(update: Update, context: ContextTypes.DEFAULT_TYPE
         except Exception:
             pass
 
+        # Runs for every update; skip building the log record when INFO is filtered out.
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
         message = getattr(update, "effective_message", None)
         chat = getattr(update, "effective_chat", None)
         user = getattr(update, "effective_user", None)
@@ -391,67 +595,13 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not candidate_id:
         return
 
-    def get_full_candidate_data(cid):
-        db = SessionLocal()
-        try:
-            c = db.query(User).filter(User.id == cid, User.role == "CANDIDATE").first()
-            if not c:
-                return None
-            return {
-                "name": c.full_name,
-                "full_name": c.full_name,
-                "bot_name": c.bot_name,
-                "province": getattr(c, "province", None),
-                "city": getattr(c, "city", None),
-                "constituency": getattr(c, "constituency", None),
-                "slogan": getattr(c, "slogan", None),
-                "resume": c.resume,
-                "ideas": c.ideas,
-                "address": c.address,
-                "phone": c.phone,
-                "socials": c.socials,
-                "bot_config": c.bot_config,
-                "image_url": getattr(c, "image_url", None),
-                "voice_url": getattr(c, "voice_url", None),
-            }
-        finally:
-            db.close()
-
-    candidate = await run_db_query(get_full_candidate_data, candidate_id)
+    candidate = await run_db_query(get_candidate_profile_sync, candidate_id)
     if not candidate:
         return
 
-    bot_config = candidate.get("bot_config")
-    if isinstance(bot_config, str):
-        try:
-            parsed = json.loads(bot_config)
-            bot_config = parsed if isinstance(parsed, dict) else {}
-        except Exception:
-            bot_config = {}
-    elif not isinstance(bot_config, dict):
-        bot_config = {}
-    candidate["bot_config"] = bot_config
-
+    # Parsed and alias-normalized once per cache fill (db_ops._normalize_profile).
+    bot_config = candidate["bot_config"]
     socials = candidate.get("socials") or {}
-    if isinstance(socials, dict):
-        if "telegramChannel" not in socials and "telegram_channel" in socials:
-            socials["telegramChannel"] = socials.get("telegram_channel")
-        if "telegramGroup" not in socials and "telegram_group" in socials:
-            socials["telegramGroup"] = socials.get("telegram_group")
-
-    if isinstance(bot_config, dict):
-        if "groupLockEnabled" not in bot_config and "auto_lock_enabled" in bot_config:
-            bot_config["groupLockEnabled"] = bool(bot_config.get("auto_lock_enabled"))
-        if "lockStartTime" not in bot_config and "lock_start_time" in bot_config:
-            bot_config["lockStartTime"] = bot_config.get("lock_start_time")
-        if "lockEndTime" not in bot_config and "lock_end_time" in bot_config:
-            bot_config["lockEndTime"] = bot_config.get("lock_end_time")
-        if "blockLinks" not in bot_config and "anti_link_enabled" in bot_config:
-            bot_config["blockLinks"] = bool(bot_config.get("anti_link_enabled"))
-        if "badWords" not in bot_config and "forbidden_words" in bot_config:
-            raw = bot_config.get("forbidden_words")
-            if isinstance(raw, str):
-                bot_config["badWords"] = [w.strip() for w in raw.split(",") if w.strip()]
 
     await save_bot_user(
         update,
@@ -466,25 +616,30 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
     try:
-        if chat_type in ["group", "supergroup"] and update.effective_chat is not None:
+        if chat_type in _GROUP_CHAT_TYPES and update.effective_chat is not None:
             chat_id_val = int(update.effective_chat.id)
-            await run_db_query(persist_group_chat_id_sync, candidate_id, chat_id_val)
+            # The (cached) profile already carries socials; only hit the DB when the id changed.
+            # bot_data remembers what this process last wrote, which also covers a profile that
+            # was cached by a concurrent read just before the write committed.
+            if context.bot_data.get("group_chat_id") != chat_id_val and not group_chat_id_is_current(
+                candidate.get("socials"), chat_id_val
+            ):
+                await run_db_query(persist_group_chat_id_sync, candidate_id, chat_id_val)
+                context.bot_data["group_chat_id"] = chat_id_val
     except Exception:
         logger.exception("Failed to persist group chat id")
 
     # --- Group management ---
-    if chat_type in ["group", "supergroup"]:
+    if chat_type in _GROUP_CHAT_TYPES:
         if bot_config.get("groupLockEnabled"):
             start_time = bot_config.get("lockStartTime")
             end_time = bot_config.get("lockEndTime")
 
             if start_time and end_time:
-                now = datetime.now().time()
-                try:
-                    start = datetime.strptime(start_time, "%H:%M").time()
-                    end = datetime.strptime(end_time, "%H:%M").time()
-
-                    is_locked = False
+                window = _lock_window(start_time, end_time)
+                if window is not None:
+                    start, end = window
+                    now = datetime.now().time()
                     if start <= end:
                         is_locked = start <= now <= end
                     else:
@@ -496,29 +651,34 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         except Exception as e:
                             logger.error("Failed to delete message in locked group: %s", e)
                         return
-                except ValueError:
-                    logger.error("Invalid time format in bot_config")
 
         bad_words = bot_config.get("badWords", [])
         if bad_words and isinstance(bad_words, list):
-            text_lower = text.lower()
-            for word in bad_words:
-                if word.strip() and word.strip().lower() in text_lower:
-                    try:
-                        await update.message.delete()
-                    except Exception as e:
-                        logger.error("Failed to delete bad word message: %s", e)
-                    return
+            bad_words_re = _bad_words_re(tuple(bad_words))
+            if bad_words_re is not None and bad_words_re.search(text.lower()):
+                try:
+                    await update.message.delete()
+                except Exception as e:
+                    logger.error("Failed to delete bad word message: %s", e)
+                return
 
         if bot_config.get("blockLinks"):
-            url_pattern = re.compile(r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+")
-            if url_pattern.search(text):
+            if _URL_RE.search(text):
                 try:
                     await update.message.delete()
                 except Exception as e:
                     logger.error("Failed to delete link message: %s", e)
                 return
 
+        # Plain group chatter only needs the moderation above. Keyboard taps, users midway
+        # through a flow and messages addressed to the bot still reach the menu logic below.
+        if (
+            context.user_data.get("state") in (None, STATE_MAIN)
+            and normalize_button_text(text) not in _menu_button_texts()
+            and not _addressed_to_bot(update, context)
+        ):
+            return
+
     # --- Private chat MVP V1 menu logic ---
 
     text = (text or "").strip()
@@ -527,60 +687,29 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Be tolerant to old/variant labels for Programs button.
     # Common cases: emoji moves due to RTL, ZWNJ differences, or older keyboards like "برنامه ها".
     # Do NOT remap during free-text states (feedback/questions/bot request) to avoid hijacking user input.
-    if state in {STATE_MAIN, STATE_ABOUT_MENU, STATE_OTHER_MENU} and btn_has(text, "برنامه"):
+    if state in _MENU_STATES and btn_has(text, "برنامه"):
         if text != BTN_PROGRAMS:
             logger.info("Mapping Programs button variant: %r -> %r (state=%s)", text, BTN_PROGRAMS, state)
         text = BTN_PROGRAMS
 
     def _has_existing_bot_request_sync(*, candidate_id: int, telegram_user_id: str, phone: str | None = None) -> bool:
-        db = SessionLocal()
+        stmt = select(BotSubmission.id).where(
+            BotSubmission.candidate_id == int(candidate_id),
+            BotSubmission.telegram_user_id == str(telegram_user_id),
+            BotSubmission.type == "BOT_REQUEST",
+        )
+        if phone:
+            stmt = stmt.where(BotSubmission.requester_contact == str(phone))
+        db = thread_session()
         try:
-            q = (
-                db.query(BotSubmission)
-                .filter(
-                    BotSubmission.candidate_id == int(candidate_id),
-                    BotSubmission.telegram_user_id == str(telegram_user_id),
-                    BotSubmission.type == "BOT_REQUEST",
-                )
-                .order_by(BotSubmission.created_at.desc())
-            )
-            if phone:
-                q = q.filter(BotSubmission.requester_contact == str(phone))
-            return q.first() is not None
+            return db.execute(stmt.limit(1)).scalar() is not None
         finally:
             db.close()
 
-    known_states = {
-        STATE_MAIN,
-        STATE_ABOUT_MENU,
-        STATE_ABOUT_DETAIL,
-        STATE_OTHER_MENU,
-        STATE_COMMITMENTS_VIEW,
-        STATE_PROGRAMS,
-        STATE_FEEDBACK_TEXT,
-        STATE_QUESTION_TEXT,
-        STATE_QUESTION_MENU,
-        STATE_QUESTION_SEARCH,
-        STATE_QUESTION_CATEGORY,
-        STATE_QUESTION_ENTRY,
-        STATE_QUESTION_VIEW_METHOD,
-        STATE_QUESTION_VIEW_CATEGORY,
-        STATE_QUESTION_VIEW_LIST,
-        STATE_QUESTION_VIEW_ANSWER,
-        STATE_QUESTION_VIEW_RESULTS,
-        STATE_QUESTION_VIEW_SEARCH_TEXT,
-        STATE_QUESTION_ASK_ENTRY,
-        STATE_QUESTION_ASK_TOPIC,
-        STATE_QUESTION_ASK_TEXT,
-        STATE_BOTREQ_NAME,
-        STATE_BOTREQ_ROLE,
-        STATE_BOTREQ_CONSTITUENCY,
-        STATE_BOTREQ_CONTACT,
-    }
-    if state not in known_states:
+    if state not in _KNOWN_STATES:
         try:
             if update.effective_user is not None:
-                log_ux_sync(
+                await log_ux(
                     candidate_id=int(candidate_id),
                     telegram_user_id=str(update.effective_user.id),
                     state=str(state),
@@ -606,12 +735,13 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if loop_count >= 6 and state != STATE_MAIN:
             last_logged_state = context.user_data.get("_loop_logged_state")
             last_logged_at = context.user_data.get("_loop_logged_at")
-            now = datetime.utcnow()
+            # Epoch seconds, so the value survives the JSON round trip through Redis persistence.
+            now = time.time()
             should_log = True
-            if last_logged_state == str(state) and isinstance(last_logged_at, datetime):
-                should_log = (now - last_logged_at) > timedelta(minutes=10)
+            if last_logged_state == str(state) and isinstance(last_logged_at, (int, float)):
+                should_log = (now - last_logged_at) > 600
             if should_log and update.effective_user is not None:
-                log_ux_sync(
+                await log_ux(
                     candidate_id=int(candidate_id),
                     telegram_user_id=str(update.effective_user.id),
                     state=str(state),
@@ -623,37 +753,21 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception:
         pass
 
-    question_step_states = {
-        STATE_QUESTION_ENTRY,
-        STATE_QUESTION_VIEW_METHOD,
-        STATE_QUESTION_VIEW_CATEGORY,
-        STATE_QUESTION_VIEW_LIST,
-        STATE_QUESTION_VIEW_ANSWER,
-        STATE_QUESTION_VIEW_RESULTS,
-        STATE_QUESTION_VIEW_SEARCH_TEXT,
-        STATE_QUESTION_ASK_ENTRY,
-        STATE_QUESTION_ASK_TOPIC,
-        STATE_QUESTION_ASK_TEXT,
-    }
-
-    if _is_back(text) and state in question_step_states:
+    if _is_back(text) and state in _QUESTION_STEP_STATES:
         pass
     elif _is_back(text):
         prev_state = state
         return_state = context.user_data.pop("_return_state", None)
         context.user_data["state"] = STATE_MAIN
-        context.user_data.pop("feedback_topic", None)
-        context.user_data.pop("botreq_full_name", None)
-        context.user_data.pop("botreq_role", None)
-        context.user_data.pop("botreq_constituency", None)
-        context.user_data.pop("botreq_contact", None)
+        for key in _BACK_CLEAR_KEYS:
+            context.user_data.pop(key, None)
 
         try:
             if prev_state and prev_state != STATE_MAIN and update.effective_user is not None:
                 ft = flow_type_from_state(prev_state)
                 if ft:
-                    track_flow_event_sync(candidate_id=int(candidate_id), flow_type=ft, event="flow_abandoned")
-                    log_ux_sync(
+                    await track_flow_event(candidate_id=int(candidate_id), flow_type=ft, event="flow_abandoned")
+                    await log_ux(
                         candidate_id=int(candidate_id),
                         telegram_user_id=str(update.effective_user.id),
                         state=str(prev_state),
@@ -677,24 +791,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Build-bot request flow (legacy steps remain, but BTN_BOT_REQUEST jumps to contact directly per spec)
     if state == STATE_BOTREQ_NAME:
-        reserved = {
-            BTN_QUESTION,
-            BTN_COMMITMENTS,
-            BTN_FEEDBACK,
-            BTN_FEEDBACK_LEGACY,
-            BTN_ABOUT_MENU,
-            BTN_OTHER_MENU,
-            BTN_ABOUT_INTRO,
-            BTN_PROGRAMS,
-            BTN_HQ_ADDRESSES,
-            BTN_VOICE_INTRO,
-            BTN_BUILD_BOT,
-            BTN_ABOUT_BOT,
-            BTN_CONTACT,
-            BTN_INTRO,
-            BTN_BOT_REQUEST,
-        }
-        if text in reserved or not text:
+        if text in _BOTREQ_NAME_RESERVED or not text:
             await safe_reply_text(update.message, "نام و نام خانوادگی را وارد کنید یا «بازگشت» را بزنید.")
             return
         if len(text) < 3:
@@ -706,8 +803,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     if state == STATE_BOTREQ_ROLE:
-        allowed = {ROLE_REPRESENTATIVE, ROLE_CANDIDATE, ROLE_TEAM}
-        if text not in allowed:
+        if text not in _ROLES_ALLOWED:
             await safe_reply_text(update.message, "لطفاً یکی از گزینه‌های نقش را انتخاب کنید.", reply_markup=build_bot_request_role_keyboard())
             return
         context.user_data["botreq_role"] = text
@@ -767,18 +863,10 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     phone=phone,
                 )
                 if is_dup:
-                    return_state = context.user_data.pop("_return_state", None)
-                    if return_state == STATE_OTHER_MENU:
-                        context.user_data["state"] = STATE_OTHER_MENU
-                        reply_markup = build_other_keyboard()
-                    else:
-                        context.user_data["state"] = STATE_MAIN
-                        reply_markup = build_main_keyboard()
+                    reply_markup = _leave_to_return_menu(context.user_data)
 
-                    context.user_data.pop("botreq_full_name", None)
-                    context.user_data.pop("botreq_role", None)
-                    context.user_data.pop("botreq_constituency", None)
-                    context.user_data.pop("botreq_contact", None)
+                    for key in _BOTREQ_KEYS:
+                        context.user_data.pop(key, None)
 
                     await safe_reply_text(update.message, "✅ درخواست شما قبلاً ثبت شده است.\nتیم پشتیبانی به‌زودی با شما تماس می‌گیرد.", reply_markup=reply_markup)
                     return
@@ -835,79 +923,26 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             requester_full_name=(full_name or None),
             requester_contact=(phone or None),
             status="new_request",
+            completes_flow="lead",
         )
 
-        try:
-            def _normalize_chat_id(value: str | None) -> str | None:
-                v = (str(value).strip() if value is not None else "")
-                if not v:
-                    return None
-                if not re.fullmatch(r"-?\d+", v):
-                    return None
-                return v
-
-            admin_chat_ids: list[str] = []
-            fixed_id = _normalize_chat_id(BOT_NOTIFY_ADMIN_CHAT_ID)
-            if fixed_id:
-                admin_chat_ids.append(fixed_id)
-
-            if BOT_NOTIFY_ADMIN_USERNAME:
-                def _resolve_admin_chat_id(username: str) -> str | None:
-                    uname = (username or "").lstrip("@").strip().lower()
-                    if not uname:
-                        return None
-                    db = SessionLocal()
-                    try:
-                        row = (
-                            db.query(BotUserRegistry)
-                            .filter(
-                                or_(
-                                    func.lower(BotUserRegistry.telegram_username) == uname,
-                                    func.lower(BotUserRegistry.telegram_username) == f"@{uname}",
-                                )
-                            )
-                            .order_by(BotUserRegistry.last_seen_at.desc())
-                            .first()
-                        )
-                        if not row:
-                            return None
-                        return str(row.telegram_user_id) if row.telegram_user_id else None
-                    finally:
-                        db.close()
-
-                resolved_id = await run_db_query(_resolve_admin_chat_id, BOT_NOTIFY_ADMIN_USERNAME)
-                resolved_id = _normalize_chat_id(resolved_id)
-                if resolved_id and resolved_id not in admin_chat_ids:
-                    admin_chat_ids.append(resolved_id)
-
-            if admin_chat_ids:
-                cand_name = normalize_text(candidate.get("full_name") or candidate.get("name") or "")
-                cand_bot = normalize_text(candidate.get("bot_name") or "")
-                header = f"📌 ثبت درخواست مشاوره (کد: {submission_id})"
-                source = f"از بات: {cand_name} (@{cand_bot})" if cand_bot else f"از بات: {cand_name}"
-                msg = "\n".join([x for x in [header, source, formatted] if x]).strip()
-                for cid in admin_chat_ids:
-                    # Don't echo the admin notification back into the same chat where the requester is talking to the bot.
-                    if update.effective_chat and str(update.effective_chat.id) == str(cid):
-                        continue
-                    await context.bot.send_message(chat_id=int(cid), text=msg)
-            else:
-                logger.warning("BOT_REQUEST admin notify skipped: no admin chat id resolved")
-        except Exception:
-            logger.exception("Failed to notify admin of BOT_REQUEST")
+        # Notify admins in the background so the requester's confirmation isn't held up by the
+        # admin lookup and extra Bot API calls.
+        context.application.create_task(
+            _notify_admins_of_bot_request(
+                context.bot,
+                submission_id=submission_id,
+                formatted=formatted,
+                candidate=candidate,
+                origin_chat_id=(update.effective_chat.id if update.effective_chat else None),
+            ),
+            update=update,
+        )
 
         # After capturing contact, automatically "go back" and remove the contact-request keyboard.
-        return_state = context.user_data.pop("_return_state", None)
-        if return_state == STATE_OTHER_MENU:
-            context.user_data["state"] = STATE_OTHER_MENU
-            reply_markup = build_other_keyboard()
-        else:
-            context.user_data["state"] = STATE_MAIN
-            reply_markup = build_main_keyboard()
-        context.user_data.pop("botreq_full_name", None)
-        context.user_data.pop("botreq_role", None)
-        context.user_data.pop("botreq_constituency", None)
-        context.user_data.pop("botreq_contact", None)
+        reply_markup = _leave_to_return_menu(context.user_data)
+        for key in _BOTREQ_KEYS:
+            context.user_data.pop(key, None)
         await safe_reply_text(
             update.message,
             """⭐️ درخواست شما با موفقیت ثبت شد!
@@ -915,11 +950,6 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 🔹 تیم پشتیبانی در کمتر از ۴۸ ساعت با شما تماس خواهد گرفت.""",
             reply_markup=reply_markup,
         )
-
-        try:
-            track_flow_event_sync(candidate_id=int(candidate_id), flow_type="lead", event="flow_completed")
-        except Exception:
-            pass
         return
 
     if state == STATE_QUESTION_MENU:
@@ -928,7 +958,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     if state == STATE_FEEDBACK_TEXT:
-        if text in {BTN_INTRO, BTN_PROGRAMS, BTN_FEEDBACK, BTN_FEEDBACK_LEGACY, BTN_QUESTION, BTN_CONTACT, BTN_BUILD_BOT}:
+        if text in _FEEDBACK_TEXT_RESERVED:
             await safe_reply_text(update.message, "برای ثبت نظر/دغدغه، لطفاً متن را ارسال کنید یا «بازگشت» را بزنید.")
             return
 
@@ -942,6 +972,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             topic=None,
             text=text,
             constituency=constituency,
+            completes_flow="comment",
         )
         context.user_data["state"] = STATE_MAIN
         context.user_data.pop("feedback_topic", None)
@@ -952,11 +983,6 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             disable_web_page_preview=True,
             reply_markup=build_main_keyboard(),
         )
-
-        try:
-            track_flow_event_sync(candidate_id=int(candidate_id), flow_type="comment", event="flow_completed")
-        except Exception:
-            pass
         return
 
     # SCREEN 1: entry
@@ -996,14 +1022,15 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await safe_reply_text(update.message, "دسته‌بندی نامعتبر است.", reply_markup=build_question_categories_keyboard(prefix_icon=True, include_back=True))
             return
 
-        def _get_category_answered(cid: int, topic: str) -> list[BotSubmission]:
-            db = SessionLocal()
+        def _get_category_answered(cid: int, topic: str):
+            # Plain rows with only the columns the cards use; no BotSubmission instances.
+            db = thread_session()
             try:
                 known = [c for c in QUESTION_CATEGORIES if c != "سایر"]
                 if topic == "سایر":
                     q = (
-                        db.query(BotSubmission)
-                        .filter(
+                        select(*_CATEGORY_ANSWER_COLS)
+                        .where(
                             BotSubmission.candidate_id == int(cid),
                             BotSubmission.type == "QUESTION",
                             BotSubmission.status == "ANSWERED",
@@ -1017,11 +1044,11 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         )
                         .order_by(BotSubmission.answered_at.asc(), BotSubmission.id.asc())
                     )
-                    return q.all()
+                    return db.execute(q).all()
 
                 q = (
-                    db.query(BotSubmission)
-                    .filter(
+                    select(*_CATEGORY_ANSWER_COLS)
+                    .where(
                         BotSubmission.candidate_id == int(cid),
                         BotSubmission.type == "QUESTION",
                         BotSubmission.status == "ANSWERED",
@@ -1031,7 +1058,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     )
                     .order_by(BotSubmission.answered_at.asc(), BotSubmission.id.asc())
                 )
-                return q.all()
+                return db.execute(q).all()
             finally:
                 db.close()
 
@@ -1109,7 +1136,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         context.user_data["question_topic"] = chosen
         try:
-            track_flow_event_sync(candidate_id=int(candidate_id), flow_type="question", event="flow_started")
+            await track_flow_event(candidate_id=int(candidate_id), flow_type="question", event="flow_started")
         except Exception:
             pass
         context.user_data["state"] = STATE_QUESTION_ASK_TEXT
@@ -1123,7 +1150,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         other_topic = normalize_text(text)
-        other_topic = re.sub(r"\s+", " ", other_topic).strip()
+        other_topic = _WHITESPACE_RE.sub(" ", other_topic).strip()
         if len(other_topic) < 2:
             await safe_reply_text(update.message, "موضوع خیلی کوتاه است. دوباره ارسال کنید:")
             return
@@ -1134,7 +1161,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Store as a single string so the DB still captures the detail without schema changes.
         context.user_data["question_topic"] = f"سایر|{other_topic}"
         try:
-            track_flow_event_sync(candidate_id=int(candidate_id), flow_type="question", event="flow_started")
+            await track_flow_event(candidate_id=int(candidate_id), flow_type="question", event="flow_started")
         except Exception:
             pass
         context.user_data["state"] = STATE_QUESTION_ASK_TEXT
@@ -1155,27 +1182,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await safe_reply_text(update.message, "متن سؤال باید حداکثر ۵۰۰ کاراکتر باشد. لطفاً کوتاه‌تر کنید:")
             return
 
-        def _looks_duplicate(cid: int, norm: str) -> bool:
-            db = SessionLocal()
-            try:
-                rows = (
-                    db.query(BotSubmission)
-                    .filter(BotSubmission.candidate_id == int(cid), BotSubmission.type == "QUESTION")
-                    .order_by(BotSubmission.id.desc())
-                    .limit(100)
-                    .all()
-                )
-                for r in rows:
-                    existing = normalize_text(getattr(r, "text", ""))
-                    existing_norm = re.sub(r"\s+", " ", existing).strip().lower()
-                    if existing_norm and existing_norm == norm:
-                        return True
-                return False
-            finally:
-                db.close()
-
-        norm = re.sub(r"\s+", " ", q_text).strip().lower()
-        is_dup = await run_db_query(_looks_duplicate, candidate_id, norm)
+        is_dup = await run_db_query(question_already_asked_sync, candidate_id, q_text)
         if is_dup:
             context.user_data["state"] = STATE_MAIN
             context.user_data.pop("question_topic", None)
@@ -1195,16 +1202,12 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             constituency=constituency,
             status="PENDING",
             is_public=False,
+            completes_flow="question",
         )
 
         context.user_data["state"] = STATE_MAIN
         context.user_data.pop("question_topic", None)
         await safe_reply_text(update.message, "ممنون. سؤال شما ثبت شد و به نماینده منتقل می‌شود.", reply_markup=build_main_keyboard())
-
-        try:
-            track_flow_event_sync(candidate_id=int(candidate_id), flow_type="question", event="flow_completed")
-        except Exception:
-            pass
         return
 
     # Programs state
@@ -1216,19 +1219,19 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     return int(tt.replace("سوال", "").strip()) - 1
                 except Exception:
                     return -1
-            m = re.match(r"^(\d{1,2})\s*\)", tt)
+            m = _PROGRAM_CHOICE_PAREN_RE.match(tt)
             if m:
                 try:
                     return int(m.group(1)) - 1
                 except Exception:
                     return -1
-            if re.fullmatch(r"\d{1,2}", tt):
+            if _PROGRAM_CHOICE_NUMBER_RE.fullmatch(tt):
                 try:
                     return int(tt) - 1
                 except Exception:
                     return -1
             # Allow selecting from richer labels like "1) 🧾 شفافیت".
-            m2 = re.match(r"^(\d{1,2})\D+", tt)
+            m2 = _PROGRAM_CHOICE_LABEL_RE.match(tt)
             if m2:
                 try:
                     return int(m2.group(1)) - 1
@@ -1316,12 +1319,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
             other_image_url = normalize_text(other_image_url)
             if other_image_url:
-                local_path = upload_file_path_from_localhost_url(other_image_url)
-                if local_path:
-                    with open(local_path, "rb") as f:
-                        await update.message.reply_photo(photo=f)
-                else:
-                    await update.message.reply_photo(photo=other_image_url)
+                await _reply_media(context, update.message, "photo", other_image_url)
         except Exception:
             logger.exception("Failed to send OTHER menu image")
 
@@ -1329,53 +1327,16 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     if btn_eq(text, BTN_COMMITMENTS):
-
-        from sqlalchemy.orm import joinedload
-        from utils.cache import cache_get_json, cache_set_json
-        import models
-
-        def _get_commitments(cid: int):
-            db = SessionLocal()
-            try:
-                rows = (
-                    db.query(models.BotCommitment)
-                    .options(joinedload(models.BotCommitment.progress_logs))
-                    .filter(models.BotCommitment.candidate_id == int(cid))
-                    .order_by(models.BotCommitment.created_at.desc())
-                    .limit(10)
-                    .all()
-                )
-                # Serialize for cache (only needed fields)
-                result = []
-                for r in rows:
-                    result.append({
-                        "id": r.id,
-                        "title": r.title,
-                        "body": r.body,
-                        "status": r.status,
-                        "created_at": r.created_at.isoformat() if r.created_at else None,
-                        "created_at_jalali": getattr(r, "created_at_jalali", None),
-                        "progress_logs": [
-                            {
-                                "created_at": log.created_at.isoformat() if log.created_at else None,
-                                "note": log.note,
-                            }
-                            for log in getattr(r, "progress_logs", [])
-                        ],
-                    })
-                return result
-            finally:
-                db.close()
-
         context.user_data["state"] = STATE_COMMITMENTS_VIEW
-        cache_key = f"commitments:{candidate_id}"
-        rows = cache_get_json(cache_key)
-        if rows is None:
-            # Not cached, fetch and cache
-            rows = await run_db_query(_get_commitments, candidate_id)
-            cache_set_json(cache_key, rows, 60)  # Cache for 60 seconds
-
-        if not rows:
+        # The formatted card texts are cached, not the rows, so a cache hit skips formatting too.
+        cache_key = f"commitment_cards:{candidate_id}"
+        cards = cache_get_json(cache_key)
+        if cards is None:
+            rows = await run_db_query(get_commitment_cards_sync, candidate_id)
+            cards = [format_commitment_card(i, r) for i, r in enumerate(rows, start=1)]
+            cache_set_json(cache_key, cards, 60)  # Cache for 60 seconds
+
+        if not cards:
             await safe_reply_text(
                 update.message,
                 "📜 تعهدات نماینده\n\nℹ️ تعهدات نماینده اسنادی رسمی هستند.\nپس از ثبت، متن آن‌ها غیرقابل ویرایش است.\nتنها وضعیت و گزارش پیشرفت به‌روزرسانی می‌شود.\n\n📭 هنوز تعهدی ثبت نشده است.",
@@ -1390,98 +1351,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             reply_markup=None,
         )
 
-        from .text_utils import to_fa_digits, to_jalali_date_ymd
-        import datetime
-
-        def _status_emoji(value: str | None) -> tuple[str, str]:
-            v = (value or "").strip().lower()
-            if v == "completed":
-                return "✅", "انجام‌شده"
-            # Spec only asks for two states; treat everything else as "in progress".
-            return "🟡", "در حال پیگیری"
-
-        def _shorten_inline(text: str, max_len: int) -> str:
-            s = normalize_text(text)
-            s = re.sub(r"\s+", " ", s).strip()
-            if not s:
-                return ""
-            if len(s) <= max_len:
-                return s
-            return (s[: max(0, max_len - 1)].rstrip() + "…")
-
-        def _summary_3_lines(text: str, *, max_lines: int = 3, line_len: int = 46) -> str:
-            s = normalize_text(text)
-            s = s.replace("\r", " ").replace("\n", " ")
-            s = re.sub(r"\s+", " ", s).strip()
-            if not s:
-                return ""
-            words = s.split(" ")
-            lines: list[str] = []
-            cur = ""
-            idx = 0
-            truncated = False
-
-            while idx < len(words) and len(lines) < max_lines:
-                w = words[idx]
-                candidate = (cur + " " + w).strip() if cur else w
-                if len(candidate) <= line_len:
-                    cur = candidate
-                    idx += 1
-                    continue
-
-                if cur:
-                    lines.append(cur)
-                    cur = ""
-                    continue
-
-                # single very-long word
-                lines.append(w[: max(1, line_len - 1)] + "…")
-                idx += 1
-
-            if cur and len(lines) < max_lines:
-                lines.append(cur)
-
-            if idx < len(words):
-                truncated = True
-
-            if truncated and lines:
-                # Ensure last line ends with ellipsis.
-                if not lines[-1].endswith("…"):
-                    if len(lines[-1]) >= line_len:
-                        lines[-1] = lines[-1][: max(1, line_len - 1)].rstrip() + "…"
-                    else:
-                        lines[-1] = lines[-1].rstrip() + "…"
-
-            return "\n".join(lines[:max_lines]).strip()
-
-        for i, r in enumerate(rows, start=1):
-            emoji, status_label = _status_emoji(str(r.get("status") or ""))
-
-            title = _shorten_inline(r.get("title", ""), 60)
-            body = normalize_text(r.get("body", ""))
-            summary = _summary_3_lines(body)
-
-            created_at_jalali = normalize_text(r.get("created_at_jalali"))
-            created_at = normalize_text(r.get("created_at"))
-            dt = None
-            if created_at:
-                try:
-                    dt = datetime.datetime.fromisoformat(created_at)
-                except Exception:
-                    dt = None
-            date_label = created_at_jalali or (to_jalali_date_ymd(dt) if dt else "—")
-
-            parts: list[str] = []
-            parts.append(f"🧾 تعهد شماره {to_fa_digits(i)}")
-            if title:
-                parts.append(f"عنوان: {title}")
-            parts.append(f"وضعیت: {emoji} {status_label}")
-            if summary:
-                parts.append("خلاصه:")
-                parts.append(summary)
-            parts.append(f"📅 تاریخ ثبت: {date_label}")
-
-            await safe_reply_text(update.message, "\n".join([p for p in parts if p]).strip(), reply_markup=None)
+        for card in cards:
+            await safe_reply_text(update.message, card, reply_markup=None)
         await safe_reply_text(update.message, "برای بازگشت، دکمه بازگشت را بزنید.", reply_markup=build_back_keyboard())
         return
 
@@ -1541,20 +1412,15 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         image_url = normalize_text(candidate.get("image_url"))
         if image_url:
-            local_path = upload_file_path_from_localhost_url(image_url)
             try:
-                if local_path:
-                    with open(local_path, "rb") as f:
-                        await update.message.reply_photo(photo=f, caption=name)
-                else:
-                    await update.message.reply_photo(photo=image_url, caption=name)
+                await _reply_media(context, update.message, "photo", image_url, caption=name)
             except Exception as e:
                 logger.error("Failed to send candidate photo: %s", e)
 
         def _parse_slogans(raw: str) -> list[str]:
             if not raw:
                 return []
-            s = re.sub(r"\r\n?", "\n", raw).strip()
+            s = _NEWLINES_RE.sub("\n", raw).strip()
             parts: list[str]
             if "\n" in s:
                 parts = [p.strip() for p in s.split("\n")]
@@ -1569,8 +1435,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
             cleaned: list[str] = []
             for p in parts:
-                p = re.sub(r"^[-•●▪▫✅🟢🔰✨\s]+", "", p).strip()
-                p = re.sub(r"\s+", " ", p)
+                p = _SLOGAN_BULLET_RE.sub("", p).strip()
+                p = _WHITESPACE_RE.sub(" ", p)
                 if p:
                     cleaned.append(p)
             return cleaned[:5]
@@ -1596,17 +1462,13 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             message_html,
             parse_mode="HTML",
             disable_web_page_preview=True,
-            reply_markup=ReplyKeyboardMarkup(
-                [[KeyboardButton(BTN_PROFILE_SUMMARY), KeyboardButton(BTN_BACK)]],
-                resize_keyboard=True,
-                is_persistent=True,
-            ),
+            reply_markup=build_profile_summary_keyboard(),
         )
         return
 
     if btn_eq(text, BTN_PROFILE_SUMMARY):
         # When accessed from the About flow, Back should return to the About menu.
-        if state in {STATE_ABOUT_MENU, STATE_ABOUT_DETAIL} or context.user_data.get("_return_state") == STATE_ABOUT_MENU:
+        if state in _ABOUT_STATES or context.user_data.get("_return_state") == STATE_ABOUT_MENU:
             context.user_data["_return_state"] = STATE_ABOUT_MENU
             context.user_data["state"] = STATE_ABOUT_DETAIL
             state = STATE_ABOUT_DETAIL
@@ -1692,7 +1554,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if btn_eq(text, BTN_VOICE_INTRO):
         # If invoked from About (or its detail pages), Back returns to the About menu.
-        if state in {STATE_ABOUT_MENU, STATE_ABOUT_DETAIL} or context.user_data.get("_return_state") == STATE_ABOUT_MENU:
+        if state in _ABOUT_STATES or context.user_data.get("_return_state") == STATE_ABOUT_MENU:
             context.user_data["_return_state"] = STATE_ABOUT_MENU
             context.user_data["state"] = STATE_ABOUT_DETAIL
             state = STATE_ABOUT_DETAIL
@@ -1709,25 +1571,24 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             local_path = upload_file_path_from_localhost_url(voice_url)
             if local_path:
                 ext = os.path.splitext(local_path)[1].lower()
-                with open(local_path, "rb") as f:
-                    if ext == ".ogg":
-                        await update.message.reply_voice(voice=f, caption=caption, reply_markup=build_back_keyboard())
-                    else:
-                        try:
-                            await update.message.reply_audio(audio=f, caption=caption, reply_markup=build_back_keyboard())
-                        except Exception:
-                            await update.message.reply_document(document=f, caption=caption, reply_markup=build_back_keyboard())
+                if ext == ".ogg":
+                    await _reply_media(context, update.message, "voice", voice_url, caption=caption, reply_markup=build_back_keyboard())
+                else:
+                    try:
+                        await _reply_media(context, update.message, "audio", voice_url, caption=caption, reply_markup=build_back_keyboard())
+                    except Exception:
+                        await _reply_media(context, update.message, "document", voice_url, caption=caption, reply_markup=build_back_keyboard())
             else:
                 try:
-                    await update.message.reply_voice(voice=voice_url, caption=caption, reply_markup=build_back_keyboard())
+                    await _reply_media(context, update.message, "voice", voice_url, caption=caption, reply_markup=build_back_keyboard())
                 except Exception:
-                    await update.message.reply_audio(audio=voice_url, caption=caption, reply_markup=build_back_keyboard())
+                    await _reply_media(context, update.message, "audio", voice_url, caption=caption, reply_markup=build_back_keyboard())
         except Exception as e:
             logger.error("Failed to send voice intro: %s", e)
             await safe_reply_text(update.message, "⚠️ فایل معرفی صوتی در دسترس نیست.")
         return
 
-    if state in {STATE_MAIN, STATE_ABOUT_MENU, STATE_OTHER_MENU} and (btn_eq(text, BTN_PROGRAMS) or btn_has(text, "برنامه")):
+    if state in _MENU_STATES and (btn_eq(text, BTN_PROGRAMS) or btn_has(text, "برنامه")):
         context.user_data["state"] = STATE_PROGRAMS
 
         intro_html = (
@@ -1739,37 +1600,12 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "👇 <b>یک پرسش را انتخاب کنید:</b>"
         )
 
-        program_buttons = [
-            "1) 🧾 شفافیت",
-            "2) 🚦 ترافیک",
-            "3) 🏠 مسکن",
-            "4) 🏘 محله",
-            "5) 🌫 هوا",
-            "6) ⚖️ عدالت",
-            "7) 🤖 هوشمند",
-            "8) 🗣 مشارکت",
-            "9) 🧭 پاسخگویی",
-            "10) 📣 ارتباط",
-        ]
-        rows = [
-            [KeyboardButton(program_buttons[1]), KeyboardButton(program_buttons[0])],
-            [KeyboardButton(program_buttons[3]), KeyboardButton(program_buttons[2])],
-            [KeyboardButton(program_buttons[5]), KeyboardButton(program_buttons[4])],
-            [KeyboardButton(program_buttons[7]), KeyboardButton(program_buttons[6])],
-            [KeyboardButton(program_buttons[9]), KeyboardButton(program_buttons[8])],
-            [KeyboardButton(BTN_BACK)],
-        ]
-
         await safe_reply_text(
             update.message,
             intro_html,
             parse_mode="HTML",
             disable_web_page_preview=True,
-            reply_markup=ReplyKeyboardMarkup(
-                rows,
-                resize_keyboard=True,
-                is_persistent=True,
-            ),
+            reply_markup=build_programs_keyboard(),
         )
         return
 
@@ -1924,7 +1760,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if btn_eq(text, BTN_BOT_REQUEST):
         try:
-            track_flow_event_sync(candidate_id=int(candidate_id), flow_type="lead", event="flow_started")
+            await track_flow_event(candidate_id=int(candidate_id), flow_type="lead", event="flow_started")
         except Exception:
             pass
         if context.user_data.get("state") == STATE_OTHER_MENU:
@@ -1940,13 +1776,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     phone=None,
                 )
                 if already:
-                    return_state = context.user_data.pop("_return_state", None)
-                    if return_state == STATE_OTHER_MENU:
-                        context.user_data["state"] = STATE_OTHER_MENU
-                        reply_markup = build_other_keyboard()
-                    else:
-                        context.user_data["state"] = STATE_MAIN
-                        reply_markup = build_main_keyboard()
+                    reply_markup = _leave_to_return_menu(context.user_data)
 
                     await safe_reply_text(
                         update.message,
@@ -2035,7 +1865,7 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
                 state = context.user_data.get("state")
 
         err = context.error
-        log_technical_error_sync(
+        await log_technical_error(
             service_name="telegram_bot",
             error_type=err.__class__.__name__ if err else "UnknownError",
             error_message=str(err) if err else "Unknown error",
@@ -1,4 +1,5 @@
 import re
+from functools import cache
 
 from telegram import ReplyKeyboardMarkup, KeyboardButton
 
@@ -14,6 +15,7 @@ from .ui_constants import (
     BTN_FEEDBACK,
     BTN_HQ_ADDRESSES,
     BTN_OTHER_MENU,
+    BTN_PROFILE_SUMMARY,
     BTN_PROGRAMS,
     BTN_QUESTION,
     BTN_REGISTER_QUESTION,
@@ -31,6 +33,12 @@ from .ui_constants import (
 )
 
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+# Static keyboards are built once and shared: telegram objects are immutable after
+# construction, so handing the same markup to every reply is safe.
+@cache
 def build_bot_request_cta_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         [[KeyboardButton(BTN_BOT_REQUEST)], [KeyboardButton(BTN_BACK)]],
@@ -39,6 +47,7 @@ def build_bot_request_cta_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cache
 def build_bot_request_role_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         [[KeyboardButton(ROLE_REPRESENTATIVE), KeyboardButton(ROLE_CANDIDATE), KeyboardButton(ROLE_TEAM)], [KeyboardButton(BTN_BACK)]],
@@ -47,6 +56,7 @@ def build_bot_request_role_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cache
 def build_bot_request_contact_keyboard() -> ReplyKeyboardMarkup:
     # Telegram will only allow the *user themself* to share their contact via this button.
     return ReplyKeyboardMarkup(
@@ -56,6 +66,7 @@ def build_bot_request_contact_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cache
 def build_main_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         [
@@ -68,6 +79,7 @@ def build_main_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cache
 def build_about_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         [
@@ -80,6 +92,7 @@ def build_about_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cache
 def build_other_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         [
@@ -92,10 +105,46 @@ def build_other_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cache
 def build_back_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup([[KeyboardButton(BTN_BACK)]], resize_keyboard=True, is_persistent=True)
 
 
+@cache
+def build_profile_summary_keyboard() -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup(
+        [[KeyboardButton(BTN_PROFILE_SUMMARY), KeyboardButton(BTN_BACK)]],
+        resize_keyboard=True,
+        is_persistent=True,
+    )
+
+
+_PROGRAM_BUTTONS = [
+    "1) 🧾 شفافیت",
+    "2) 🚦 ترافیک",
+    "3) 🏠 مسکن",
+    "4) 🏘 محله",
+    "5) 🌫 هوا",
+    "6) ⚖️ عدالت",
+    "7) 🤖 هوشمند",
+    "8) 🗣 مشارکت",
+    "9) 🧭 پاسخگویی",
+    "10) 📣 ارتباط",
+]
+
+
+@cache
+def build_programs_keyboard() -> ReplyKeyboardMarkup:
+    # Pairs are laid out right-to-left (2|1, 4|3, ...) to read naturally in Persian.
+    rows = [
+        [KeyboardButton(_PROGRAM_BUTTONS[i + 1]), KeyboardButton(_PROGRAM_BUTTONS[i])]
+        for i in range(0, len(_PROGRAM_BUTTONS), 2)
+    ]
+    rows.append([KeyboardButton(BTN_BACK)])
+    return ReplyKeyboardMarkup(rows, resize_keyboard=True, is_persistent=True)
+
+
+@cache
 def build_question_hub_keyboard() -> ReplyKeyboardMarkup:
     rows: list[list[KeyboardButton]] = []
     cat_buttons = [KeyboardButton(f"🗂 {c}") for c in QUESTION_CATEGORIES]
@@ -106,6 +155,7 @@ def build_question_hub_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(rows, resize_keyboard=True, is_persistent=True)
 
 
+@cache
 def build_question_entry_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         [[KeyboardButton(BTN_VIEW_QUESTIONS)], [KeyboardButton(BTN_ASK_NEW_QUESTION)], [KeyboardButton(BTN_BACK)]],
@@ -114,6 +164,7 @@ def build_question_entry_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cache
 def build_question_view_method_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         [[KeyboardButton(BTN_VIEW_BY_CATEGORY), KeyboardButton(BTN_VIEW_BY_SEARCH)], [KeyboardButton(BTN_BACK)]],
@@ -122,6 +173,7 @@ def build_question_view_method_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cache
 def build_question_ask_entry_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         [[KeyboardButton(BTN_SELECT_TOPIC)], [KeyboardButton(BTN_BACK)]],
@@ -130,6 +182,7 @@ def build_question_ask_entry_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cache
 def build_question_categories_keyboard(*, prefix_icon: bool, include_back: bool) -> ReplyKeyboardMarkup:
     rows: list[list[KeyboardButton]] = []
     buttons = [KeyboardButton(f"🗂 {c}") for c in QUESTION_CATEGORIES] if prefix_icon else [KeyboardButton(c) for c in QUESTION_CATEGORIES]
@@ -145,7 +198,7 @@ def build_question_list_keyboard(items: list[dict], *, normalize_text) -> ReplyK
     buttons: list[KeyboardButton] = []
     for idx, it in enumerate(items, start=1):
         q = normalize_text(it.get("q") or "")
-        q = re.sub(r"\s+", " ", q).strip()
+        q = _WHITESPACE_RE.sub(" ", q).strip()
         if len(q) > 48:
             q = q[:47] + "…"
         buttons.append(KeyboardButton(f"{idx}) {q}" if q else f"{idx})"))
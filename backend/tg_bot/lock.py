@@ -2,6 +2,7 @@ import atexit
 import logging
 import os
 import tempfile
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +16,27 @@ def default_lock_path() -> str:
     return os.path.join(tempfile.gettempdir(), LOCK_FILENAME)
 
 
+@lru_cache(maxsize=1)
+def _win_process_api():
+    """kernel32 process functions with prototypes set; bound once per process (Windows only)."""
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    OpenProcess = kernel32.OpenProcess
+    OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    OpenProcess.restype = wintypes.HANDLE
+
+    GetExitCodeProcess = kernel32.GetExitCodeProcess
+    GetExitCodeProcess.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD)]
+    GetExitCodeProcess.restype = wintypes.BOOL
+
+    CloseHandle = kernel32.CloseHandle
+    CloseHandle.argtypes = [wintypes.HANDLE]
+    CloseHandle.restype = wintypes.BOOL
+    return OpenProcess, GetExitCodeProcess, CloseHandle
+
+
 def is_pid_running(pid: int) -> bool:
     if pid <= 0:
         return False
@@ -27,18 +49,7 @@ def is_pid_running(pid: int) -> bool:
             PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
             STILL_ACTIVE = 259
 
-            kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
-            OpenProcess = kernel32.OpenProcess
-            OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
-            OpenProcess.restype = wintypes.HANDLE
-
-            GetExitCodeProcess = kernel32.GetExitCodeProcess
-            GetExitCodeProcess.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD)]
-            GetExitCodeProcess.restype = wintypes.BOOL
-
-            CloseHandle = kernel32.CloseHandle
-            CloseHandle.argtypes = [wintypes.HANDLE]
-            CloseHandle.restype = wintypes.BOOL
+            OpenProcess, GetExitCodeProcess, CloseHandle = _win_process_api()
 
             h = OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, int(pid))
             if not h:
@@ -242,7 +253,7 @@ def acquire_single_instance_lock(lock_path: str) -> None:
                     pass
 
             atexit.register(_cleanup_file_lock)
-            logger.info(f"Acquired bot_runner Windows file lock: {lock_path} (pid={os.getpid()})")
+            logger.info("Acquired bot_runner Windows file lock: %s (pid=%s)", lock_path, os.getpid())
             return
         except SystemExit:
             raise
@@ -272,7 +283,7 @@ def acquire_single_instance_lock(lock_path: str) -> None:
                     pass
 
             atexit.register(_cleanup)
-            logger.info(f"Acquired bot_runner lock: {lock_path} (pid={pid})")
+            logger.info("Acquired bot_runner lock: %s (pid=%s)", lock_path, pid)
             return
         except FileExistsError:
             try:
@@ -1,15 +1,20 @@
 import asyncio
 import logging
 import os
+import random
+from collections import Counter
 from datetime import datetime, timedelta, timezone
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import insert, text, update
+from telegram.error import Conflict
 from telegram.ext import Application
 
-from database import SessionLocal
+from database import engine
 import models
 
+from .db_ops import _UPSERT_INSERTS, run_db_query, thread_session
+
 logger = logging.getLogger(__name__)
 
 _last_409_logged_at_by_candidate: dict[int, datetime] = {}
@@ -18,9 +23,14 @@ _last_409_logged_at_by_candidate: dict[int, datetime] = {}
 class Telegram409ConflictHandler(logging.Handler):
     def emit(self, record: logging.LogRecord) -> None:
         try:
-            msg = record.getMessage() or ""
-            if "terminated by other getUpdates request" not in msg and "telegram.error.Conflict" not in msg:
+            # 409s are logged at ERROR; skip formatting the Updater's routine records.
+            if record.levelno < logging.WARNING:
                 return
+            exc = record.exc_info[1] if record.exc_info else None
+            if not isinstance(exc, Conflict):
+                msg = record.getMessage() or ""
+                if "terminated by other getUpdates request" not in msg and "telegram.error.Conflict" not in msg:
+                    return
 
             # The runner keeps a global running_bots dict; we import lazily to avoid cycles.
             from .runner import running_bots  # noqa: WPS433
@@ -42,7 +52,8 @@ class Telegram409ConflictHandler(logging.Handler):
                     )
                 except Exception:
                     pass
-                log_technical_error_sync(
+                # Emitted on the event loop thread: queue the row rather than commit inline.
+                log_technical_error_nowait(
                     service_name="telegram_bot",
                     error_type="Conflict409",
                     error_message=(
@@ -60,22 +71,54 @@ class Telegram409ConflictHandler(logging.Handler):
 def install_409_conflict_logger() -> None:
     try:
         updater_logger = logging.getLogger("telegram.ext.Updater")
-        updater_logger.addHandler(Telegram409ConflictHandler())
+        updater_logger.addHandler(Telegram409ConflictHandler(level=logging.WARNING))
     except Exception:
         pass
 
 
+def _ux_row(*, candidate_id: int, telegram_user_id: str, state: str | None, action: str, expected_action: str | None = None) -> dict:
+    return dict(
+        candidate_id=int(candidate_id),
+        telegram_user_id=str(telegram_user_id),
+        state=state,
+        action=str(action),
+        expected_action=expected_action,
+        created_at=datetime.utcnow(),
+    )
+
+
+def _technical_error_row(
+    *,
+    service_name: str,
+    error_type: str,
+    error_message: str,
+    telegram_user_id: str | None = None,
+    candidate_id: int | None = None,
+    state: str | None = None,
+) -> dict:
+    return dict(
+        service_name=str(service_name),
+        error_type=str(error_type),
+        error_message=str(error_message)[:4000],
+        telegram_user_id=str(telegram_user_id) if telegram_user_id is not None else None,
+        candidate_id=int(candidate_id) if candidate_id is not None else None,
+        state=state,
+        created_at=datetime.utcnow(),
+    )
+
+
 def log_ux_sync(*, candidate_id: int, telegram_user_id: str, state: str | None, action: str, expected_action: str | None = None) -> None:
-    db: Session = SessionLocal()
+    db: Session = thread_session()
     try:
         db.add(
             models.BotUxLog(
-                candidate_id=int(candidate_id),
-                telegram_user_id=str(telegram_user_id),
-                state=state,
-                action=str(action),
-                expected_action=expected_action,
-                created_at=datetime.utcnow(),
+                **_ux_row(
+                    candidate_id=candidate_id,
+                    telegram_user_id=telegram_user_id,
+                    state=state,
+                    action=action,
+                    expected_action=expected_action,
+                )
             )
         )
         db.commit()
@@ -85,27 +128,56 @@ def log_ux_sync(*, candidate_id: int, telegram_user_id: str, state: str | None,
         db.close()
 
 
-def track_path_sync(*, candidate_id: int, path: str) -> None:
-    def _inc(db: Session, cid: int | None, p: str) -> None:
-        row = (
-            db.query(models.BotFlowPathCounter)
-            .filter(models.BotFlowPathCounter.candidate_id.is_(None) if cid is None else models.BotFlowPathCounter.candidate_id == int(cid))
-            .filter(models.BotFlowPathCounter.path == str(p))
-            .first()
-        )
-        if row is None:
-            row = models.BotFlowPathCounter(candidate_id=cid, path=str(p), count=0, updated_at=datetime.utcnow())
-            db.add(row)
-        row.count = int(row.count or 0) + 1
-        row.updated_at = datetime.utcnow()
+def _bump_counter(conn, model, column: str, n: int, **key) -> None:
+    """UPDATE-then-INSERT for a counter row, for keys/dialects where ON CONFLICT can't be used."""
+    now = datetime.utcnow()
+    where = [getattr(model, k).is_(None) if v is None else getattr(model, k) == v for k, v in key.items()]
+    updated = conn.execute(
+        update(model).where(*where).values({column: getattr(model, column) + int(n), "updated_at": now})
+    ).rowcount
+    if not updated:
+        conn.execute(insert(model).values(**key, **{column: int(n)}, updated_at=now))
+
+
+def _upsert_path_counter(conn, *, candidate_id: int, path: str, n: int = 1) -> bool:
+    """Add `n` to a candidate's BotFlowPathCounter row with one INSERT .. ON CONFLICT DO UPDATE.
+
+    Returns False when the dialect has no upsert. Not usable for the global (NULL candidate_id)
+    rows: NULLs never conflict on uq_bot_flowpath_candidate_path.
+    """
+    upsert_insert = _UPSERT_INSERTS.get(engine.dialect.name)
+    if upsert_insert is None:
+        return False
+    now = datetime.utcnow()
+    stmt = upsert_insert(models.BotFlowPathCounter).values(
+        candidate_id=int(candidate_id), path=str(path), count=int(n), updated_at=now
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.BotFlowPathCounter.candidate_id, models.BotFlowPathCounter.path],
+        set_={"count": models.BotFlowPathCounter.count + int(n), "updated_at": now},
+    )
+    conn.execute(stmt)
+    return True
+
+
+def _bump_path_counters(conn, *, candidate_id: int, path: str, n: int = 1) -> None:
+    """Add `n` to both the candidate's and the global counter row for `path`."""
+    if not _upsert_path_counter(conn, candidate_id=candidate_id, path=path, n=n):
+        _bump_counter(conn, models.BotFlowPathCounter, "count", n, candidate_id=int(candidate_id), path=str(path))
+    _bump_counter(conn, models.BotFlowPathCounter, "count", n, candidate_id=None, path=str(path))
+
 
-    db = SessionLocal()
+def track_path_sync(*, candidate_id: int, path: str) -> None:
     try:
-        _inc(db, int(candidate_id), path)
-        _inc(db, None, path)
-        db.commit()
-    finally:
-        db.close()
+        with engine.begin() as conn:
+            _bump_path_counters(conn, candidate_id=candidate_id, path=path)
+        return
+    except Exception:
+        # e.g. an old SQLite file without uq_bot_flowpath_candidate_path.
+        logger.debug("path counter upsert failed; falling back to UPDATE/INSERT", exc_info=True)
+    with engine.begin() as conn:
+        _bump_counter(conn, models.BotFlowPathCounter, "count", 1, candidate_id=int(candidate_id), path=str(path))
+        _bump_counter(conn, models.BotFlowPathCounter, "count", 1, candidate_id=None, path=str(path))
 
 
 def log_technical_error_sync(
@@ -117,17 +189,18 @@ def log_technical_error_sync(
     candidate_id: int | None = None,
     state: str | None = None,
 ) -> None:
-    db: Session = SessionLocal()
+    db: Session = thread_session()
     try:
         db.add(
             models.TechnicalErrorLog(
-                service_name=str(service_name),
-                error_type=str(error_type),
-                error_message=str(error_message)[:4000],
-                telegram_user_id=str(telegram_user_id) if telegram_user_id is not None else None,
-                candidate_id=int(candidate_id) if candidate_id is not None else None,
-                state=state,
-                created_at=datetime.utcnow(),
+                **_technical_error_row(
+                    service_name=service_name,
+                    error_type=error_type,
+                    error_message=error_message,
+                    telegram_user_id=telegram_user_id,
+                    candidate_id=candidate_id,
+                    state=state,
+                )
             )
         )
         db.commit()
@@ -137,13 +210,78 @@ def log_technical_error_sync(
         db.close()
 
 
+_FLOW_EVENT_COLUMNS = {
+    "flow_started": "started_count",
+    "flow_completed": "completed_count",
+    "flow_abandoned": "abandoned_count",
+}
+
+
+def _upsert_flow_counter(*, candidate_id: int, flow_type: str, column: str, conn=None, n: int = 1) -> bool:
+    """Add `n` to one BotFlowDropCounter column with a single INSERT .. ON CONFLICT DO UPDATE.
+
+    Runs on `conn` (the caller's transaction) when given. Returns False when the dialect has
+    no upsert, so the caller uses the ORM path.
+    """
+    upsert_insert = _UPSERT_INSERTS.get(engine.dialect.name)
+    if upsert_insert is None:
+        return False
+    now = datetime.utcnow()
+    values = dict(
+        candidate_id=int(candidate_id),
+        flow_type=str(flow_type),
+        started_count=0,
+        completed_count=0,
+        abandoned_count=0,
+        updated_at=now,
+    )
+    values[column] = int(n)
+    stmt = upsert_insert(models.BotFlowDropCounter).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.BotFlowDropCounter.candidate_id, models.BotFlowDropCounter.flow_type],
+        set_={column: getattr(models.BotFlowDropCounter, column) + int(n), "updated_at": now},
+    )
+    if conn is not None:
+        conn.execute(stmt)
+        return True
+    with engine.begin() as conn:
+        conn.execute(stmt)
+    return True
+
+
+def track_flow_event_in_transaction(conn, *, candidate_id: int, flow_type: str, event: str) -> bool:
+    """Count a flow event inside the caller's open transaction, under a SAVEPOINT.
+
+    Lets a write and its flow counter share one commit. A failed upsert only rolls back the
+    savepoint, never the caller's write; False means it wasn't counted (use track_flow_event_sync).
+    """
+    column = _FLOW_EVENT_COLUMNS.get(str(event).strip().lower())
+    if column is None:
+        return True
+    try:
+        with conn.begin_nested():
+            return _upsert_flow_counter(candidate_id=candidate_id, flow_type=flow_type, column=column, conn=conn)
+    except Exception:
+        logger.debug("in-transaction flow counter upsert failed", exc_info=True)
+        return False
+
+
 def track_flow_event_sync(*, candidate_id: int, flow_type: str, event: str) -> None:
     event = str(event).strip().lower()
-    if event not in {"flow_started", "flow_completed", "flow_abandoned"}:
+    column = _FLOW_EVENT_COLUMNS.get(event)
+    if column is None:
         return
 
-    db: Session = SessionLocal()
     try:
+        if _upsert_flow_counter(candidate_id=candidate_id, flow_type=flow_type, column=column):
+            return
+    except Exception:
+        # e.g. an old SQLite file without uq_bot_flowdrop_candidate_flow; the ORM path still works.
+        logger.debug("flow counter upsert failed; falling back to ORM update", exc_info=True)
+
+    db: Session = thread_session()
+    try:
+        now = datetime.utcnow()
         row = (
             db.query(models.BotFlowDropCounter)
             .filter(models.BotFlowDropCounter.candidate_id == int(candidate_id))
@@ -157,18 +295,41 @@ def track_flow_event_sync(*, candidate_id: int, flow_type: str, event: str) -> N
                 started_count=0,
                 completed_count=0,
                 abandoned_count=0,
-                updated_at=datetime.utcnow(),
+                updated_at=now,
             )
             db.add(row)
 
-        if event == "flow_started":
-            row.started_count = int(row.started_count or 0) + 1
-        elif event == "flow_completed":
-            row.completed_count = int(row.completed_count or 0) + 1
-        else:
-            row.abandoned_count = int(row.abandoned_count or 0) + 1
+        setattr(row, column, int(getattr(row, column) or 0) + 1)
+
+        row.updated_at = now
+        db.commit()
+    except Exception:
+        db.rollback()
+    finally:
+        db.close()
+
 
-        row.updated_at = datetime.utcnow()
+def _record_health_checks_sync(*, candidate_id: int, checks: list[tuple[str, bool]]) -> None:
+    """Ping the DB and write this tick's BotHealthCheck rows in one commit."""
+    db: Session = thread_session()
+    try:
+        ok = True
+        try:
+            db.execute(text("SELECT 1"))
+        except Exception:
+            ok = False
+            db.rollback()
+
+        created_at = datetime.utcnow()
+        db.add_all(
+            models.BotHealthCheck(
+                candidate_id=int(candidate_id),
+                check_type=check_type,
+                status="ok" if passed else "failed",
+                created_at=created_at,
+            )
+            for check_type, passed in [("database_reachable", ok), *checks]
+        )
         db.commit()
     except Exception:
         db.rollback()
@@ -176,6 +337,188 @@ def track_flow_event_sync(*, candidate_id: int, flow_type: str, event: str) -> N
         db.close()
 
 
+def _insert_rows_sync(model, rows: list[dict]) -> None:
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(model), rows)
+    except Exception:
+        logger.debug("Failed to write %s rows", model.__tablename__, exc_info=True)
+
+
+def write_telemetry_sync(batch: list[tuple[str, object]]) -> None:
+    """Write a batch of queued UX logs, error logs and flow/path counter bumps in one transaction.
+
+    Log rows go in with one executemany per table; counter bumps for the same key are summed
+    first, so a burst costs one statement per distinct counter. If the batch fails as a whole
+    (e.g. an old SQLite file without the counters' unique keys), events are retried one by one.
+    """
+    ux_rows: list[dict] = []
+    error_rows: list[dict] = []
+    flows: Counter = Counter()
+    paths: Counter = Counter()
+    for kind, item in batch:
+        if kind == "ux":
+            ux_rows.append(item)
+        elif kind == "error":
+            error_rows.append(item)
+        elif kind == "flow":
+            flows[item] += 1
+        elif kind == "path":
+            candidate_id, path = item
+            paths[(candidate_id, path)] += 1
+
+    try:
+        with engine.begin() as conn:
+            if ux_rows:
+                conn.execute(insert(models.BotUxLog), ux_rows)
+            if error_rows:
+                conn.execute(insert(models.TechnicalErrorLog), error_rows)
+            for (candidate_id, flow_type, event), n in flows.items():
+                column = _FLOW_EVENT_COLUMNS[event]
+                if not _upsert_flow_counter(candidate_id=candidate_id, flow_type=flow_type, column=column, conn=conn, n=n):
+                    _bump_counter(conn, models.BotFlowDropCounter, column, n, candidate_id=candidate_id, flow_type=flow_type)
+            for (candidate_id, path), n in paths.items():
+                _bump_path_counters(conn, candidate_id=candidate_id, path=path, n=n)
+        return
+    except Exception:
+        logger.warning("Telemetry batch write failed; retrying events one by one", exc_info=True)
+
+    if ux_rows:
+        _insert_rows_sync(models.BotUxLog, ux_rows)
+    if error_rows:
+        _insert_rows_sync(models.TechnicalErrorLog, error_rows)
+    for (candidate_id, flow_type, event), n in flows.items():
+        for _ in range(n):
+            track_flow_event_sync(candidate_id=candidate_id, flow_type=flow_type, event=event)
+    for kind, item in batch:
+        if kind == "path":
+            try:
+                track_path_sync(candidate_id=item[0], path=item[1])
+            except Exception:
+                pass
+
+
+# Set while telemetry_writer() runs; the async log_ux/track_*/log_technical_error helpers then
+# enqueue instead of writing inline (same scheme as db_ops.bot_user_writer).
+_telemetry_queue: asyncio.Queue | None = None
+_TELEMETRY_FLUSH_INTERVAL_SEC = 0.25
+_TELEMETRY_FLUSH_MAX_BATCH = 500
+# If the DB falls behind, drop the oldest events rather than grow without bound.
+_TELEMETRY_QUEUE_MAX = 10_000
+
+
+async def telemetry_writer() -> None:
+    """Coalesce UX/error logs and flow/path counters and flush them every ~250 ms.
+
+    Handlers no longer wait on a commit per event; pending events are flushed on exit.
+    """
+    global _telemetry_queue
+    queue: asyncio.Queue = asyncio.Queue()
+    _telemetry_queue = queue
+    batch: list = []
+    flushing = None
+    try:
+        while True:
+            batch.append(await queue.get())
+            await asyncio.sleep(_TELEMETRY_FLUSH_INTERVAL_SEC)
+            while len(batch) < _TELEMETRY_FLUSH_MAX_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
+            # Shielded so a cancel during the write lets it finish instead of repeating it below.
+            flushing = asyncio.ensure_future(run_db_query(write_telemetry_sync, batch))
+            await asyncio.shield(flushing)
+            batch = []
+            flushing = None
+    finally:
+        _telemetry_queue = None
+        if flushing is not None:
+            # Cancelled while (or right after) writing this batch: it is covered by that write.
+            if not flushing.done():
+                await asyncio.wait([flushing])
+            batch = []
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        if batch:
+            write_telemetry_sync(batch)
+
+
+def _enqueue_telemetry(kind: str, item) -> bool:
+    queue = _telemetry_queue
+    if queue is None:
+        return False
+    if queue.qsize() >= _TELEMETRY_QUEUE_MAX:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait((kind, item))
+    return True
+
+
+async def log_ux(*, candidate_id: int, telegram_user_id: str, state: str | None, action: str, expected_action: str | None = None) -> None:
+    row = _ux_row(
+        candidate_id=candidate_id,
+        telegram_user_id=telegram_user_id,
+        state=state,
+        action=action,
+        expected_action=expected_action,
+    )
+    if not _enqueue_telemetry("ux", row):
+        await run_db_query(_insert_rows_sync, models.BotUxLog, [row])
+
+
+async def log_technical_error(
+    *,
+    service_name: str,
+    error_type: str,
+    error_message: str,
+    telegram_user_id: str | None = None,
+    candidate_id: int | None = None,
+    state: str | None = None,
+) -> None:
+    row = _technical_error_row(
+        service_name=service_name,
+        error_type=error_type,
+        error_message=error_message,
+        telegram_user_id=telegram_user_id,
+        candidate_id=candidate_id,
+        state=state,
+    )
+    if not _enqueue_telemetry("error", row):
+        await run_db_query(_insert_rows_sync, models.TechnicalErrorLog, [row])
+
+
+def log_technical_error_nowait(**kwargs) -> None:
+    """log_technical_error() for sync code (e.g. logging handlers) that may run on the event loop.
+
+    Queues the row when called on the loop thread while telemetry_writer() runs; otherwise
+    writes it inline.
+    """
+    try:
+        asyncio.get_running_loop()
+        queued = _enqueue_telemetry("error", _technical_error_row(**kwargs))
+    except RuntimeError:
+        queued = False
+    if not queued:
+        log_technical_error_sync(**kwargs)
+
+
+async def track_flow_event(*, candidate_id: int, flow_type: str, event: str) -> None:
+    event = str(event).strip().lower()
+    if event not in _FLOW_EVENT_COLUMNS:
+        return
+    if not _enqueue_telemetry("flow", (int(candidate_id), str(flow_type), event)):
+        await run_db_query(track_flow_event_sync, candidate_id=candidate_id, flow_type=flow_type, event=event)
+
+
+async def track_path(*, candidate_id: int, path: str) -> None:
+    if not _enqueue_telemetry("path", (int(candidate_id), str(path))):
+        await run_db_query(track_path_sync, candidate_id=candidate_id, path=path)
+
+
+# Upper bound on one tick's DB ping + write before the loop moves on.
+_HEALTH_DB_TIMEOUT_SEC = 10
+
+
 async def health_check_loop(application: Application, *, candidate_id: int) -> None:
     def _clamp(v: int, lo: int, hi: int) -> int:
         return max(lo, min(hi, v))
@@ -197,49 +540,13 @@ async def health_check_loop(application: Application, *, candidate_id: int) -> N
 
     while True:
         now = datetime.now(timezone.utc)
-
-        db: Session = SessionLocal()
-        try:
-            ok = True
-            try:
-                db.execute(func.now())
-            except Exception:
-                ok = False
-
-            db.add(
-                models.BotHealthCheck(
-                    candidate_id=int(candidate_id),
-                    check_type="database_reachable",
-                    status="ok" if ok else "failed",
-                    created_at=datetime.utcnow(),
-                )
-            )
-            db.commit()
-        except Exception:
-            db.rollback()
-        finally:
-            db.close()
+        checks: list[tuple[str, bool]] = []
 
         try:
             last = application.bot_data.get("last_update_received_at")
             threshold_sec = max(interval * 2, 180)
             recv_ok = bool(last and isinstance(last, datetime) and (now - last.replace(tzinfo=timezone.utc)).total_seconds() <= threshold_sec)
-
-            db2: Session = SessionLocal()
-            try:
-                db2.add(
-                    models.BotHealthCheck(
-                        candidate_id=int(candidate_id),
-                        check_type="bot_can_receive_updates",
-                        status="ok" if recv_ok else "failed",
-                        created_at=datetime.utcnow(),
-                    )
-                )
-                db2.commit()
-            except Exception:
-                db2.rollback()
-            finally:
-                db2.close()
+            checks.append(("bot_can_receive_updates", recv_ok))
         except Exception:
             pass
 
@@ -249,21 +556,18 @@ async def health_check_loop(application: Application, *, candidate_id: int) -> N
                 await application.bot.send_chat_action(chat_id=health_chat_id, action="typing")
             except Exception:
                 send_ok = False
+            checks.append(("bot_can_send_message", send_ok))
 
-            db3: Session = SessionLocal()
-            try:
-                db3.add(
-                    models.BotHealthCheck(
-                        candidate_id=int(candidate_id),
-                        check_type="bot_can_send_message",
-                        status="ok" if send_ok else "failed",
-                        created_at=datetime.utcnow(),
-                    )
-                )
-                db3.commit()
-            except Exception:
-                db3.rollback()
-            finally:
-                db3.close()
+        try:
+            # A stuck DB must not stall the loop; the tick is simply not recorded.
+            await asyncio.wait_for(
+                run_db_query(_record_health_checks_sync, candidate_id=int(candidate_id), checks=checks),
+                timeout=_HEALTH_DB_TIMEOUT_SEC,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Health check DB write timed out after %ss (candidate_id=%s)", _HEALTH_DB_TIMEOUT_SEC, candidate_id)
+        except Exception:
+            pass
 
-        await asyncio.sleep(interval)
+        # ±10% jitter so bots started together don't keep hitting the DB in the same instant.
+        await asyncio.sleep(interval + random.uniform(-interval * 0.1, interval * 0.1))
@@ -1,5 +1,6 @@
 import os
 import urllib.request
+from functools import lru_cache
 
 
 _AUTO_TRUST_ENV_DECISION: bool | None = None
@@ -10,7 +11,10 @@ def env_truthy(name: str) -> bool:
     return v in {"1", "true", "yes", "y", "on"}
 
 
+@lru_cache(maxsize=1)
 def windows_system_proxy_url() -> str | None:
+    # getproxies() reads the Windows registry (Internet Settings) on every call; the
+    # system proxy is read once per process. Call .cache_clear() to re-read it.
     if os.name != "nt":
         return None
     try:
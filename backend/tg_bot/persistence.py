@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+from functools import lru_cache
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from .config import BOT_USER_STATE_TTL_SEC
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4)
+def _async_redis_client_for(url: str):
+    # One client (and connection pool) per URL, shared by every bot in the runner's event loop.
+    import redis.asyncio as aioredis
+
+    return aioredis.Redis.from_url(url, decode_responses=True)
+
+
+def _user_state_key(candidate_id: int, user_id: int | str) -> str:
+    return f"bot:{int(candidate_id)}:user:{user_id}:state"
+
+
+class RedisUserDataPersistence(BasePersistence):
+    """Keeps each bot's `context.user_data` (menu state, half-filled forms) in Redis.
+
+    Only user_data is stored, one JSON value per user with a sliding TTL, so a user's
+    conversation survives a bot restart (check_for_new_candidates restarts unhealthy bots)
+    and any runner process can pick it up. PTB writes changed users back every
+    `update_interval` seconds and on shutdown.
+    """
+
+    def __init__(self, redis_client, *, candidate_id: int, ttl_s: int = BOT_USER_STATE_TTL_SEC, update_interval: float = 60):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self._redis = redis_client
+        self._candidate_id = int(candidate_id)
+        self._ttl_s = max(1, int(ttl_s))
+
+    async def get_user_data(self) -> dict:
+        prefix = _user_state_key(self._candidate_id, "")[: -len(":state")]
+        data: dict[int, dict] = {}
+        try:
+            keys = [k async for k in self._redis.scan_iter(match=f"{prefix}*:state", count=500)]
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                for key, raw in zip(batch, await self._redis.mget(batch)):
+                    if not raw:
+                        continue
+                    try:
+                        user_id = int(key[len(prefix) : -len(":state")])
+                        value = json.loads(raw)
+                    except Exception:
+                        continue
+                    if isinstance(value, dict):
+                        data[user_id] = value
+        except Exception as e:
+            logger.warning("Could not load user state from Redis (candidate_id=%s): %s", self._candidate_id, e)
+        return data
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        try:
+            raw = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+            await self._redis.set(_user_state_key(self._candidate_id, user_id), raw, ex=self._ttl_s)
+        except Exception as e:
+            logger.warning("Could not store user state in Redis (candidate_id=%s): %s", self._candidate_id, e)
+
+    async def drop_user_data(self, user_id: int) -> None:
+        try:
+            await self._redis.delete(_user_state_key(self._candidate_id, user_id))
+        except Exception:
+            pass
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        # Each bot runs in exactly one process (single-instance lock), so the in-memory copy
+        # is authoritative; re-reading Redis on every update would only add a round trip.
+        return None
+
+    async def flush(self) -> None:
+        # Writes go straight to Redis in update_user_data; nothing is buffered.
+        return None
+
+    # Not stored (see store_data); PTB still requires these to exist.
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        return {}
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        return None
+
+    async def update_bot_data(self, data: dict) -> None:
+        return None
+
+    async def update_callback_data(self, data) -> None:
+        return None
+
+    async def update_conversation(self, name: str, key, new_state) -> None:
+        return None
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        return None
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        return None
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        return None
+
+
+def user_data_persistence(candidate_id: int) -> RedisUserDataPersistence | None:
+    """Redis-backed user_data persistence for one bot, or None (no REDIS_URL / disabled / no redis)."""
+    url = (os.getenv("REDIS_URL") or "").strip()
+    if not url or BOT_USER_STATE_TTL_SEC <= 0:
+        return None
+    try:
+        return RedisUserDataPersistence(_async_redis_client_for(url), candidate_id=candidate_id)
+    except Exception as e:
+        logger.warning("User state persistence unavailable, keeping it in memory: %s", e)
+        return None
@@ -1,23 +1,58 @@
 import asyncio
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
 from urllib.parse import urlparse
 
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
+from sqlalchemy.orm import load_only, raiseload
+from telegram.ext import AIORateLimiter, Application, CommandHandler, MessageHandler, filters
 from telegram.request import HTTPXRequest
 from telegram.error import NetworkError, TimedOut
 
-from database import SessionLocal, Base, engine
+from database import SessionLocal, Base, engine, warm_pool
+from db_maintenance import backfill_question_text_hashes
 from models import User
-
-from .config import BOT_CONCURRENT_UPDATES, FAILED_BOT_COOLDOWN, TELEGRAM_CONNECTION_POOL_SIZE
-from .db_ops import looks_like_telegram_token, run_db_query
-from .monitoring import health_check_loop, log_technical_error_sync
+from utils.cache import CANDIDATE_EVENTS_CHANNEL
+
+from .config import (
+    BOT_CANDIDATE_EVENT_POLL_SEC,
+    BOT_CANDIDATE_POLL_SEC,
+    BOT_CONCURRENT_UPDATES,
+    BOT_DB_THREADS,
+    FAILED_BOT_COOLDOWN,
+    TELEGRAM_CONNECTION_POOL_SIZE,
+    TELEGRAM_HTTP_VERSION,
+    TELEGRAM_RATE_LIMIT,
+)
+from .db_ops import _CANDIDATE_SNAPSHOT_COLS, bot_user_writer, candidate_snapshot, looks_like_telegram_token, run_db_query
+from .monitoring import health_check_loop, log_technical_error, telemetry_writer
 from .net import auto_decide_trust_env_for_telegram, env_truthy, windows_system_proxy_url
+from .persistence import user_data_persistence
 
 logger = logging.getLogger(__name__)
 
+# What run_bot and candidate_snapshot read; the poller runs every 10s, so it skips
+# resume/ideas/socials and the other profile columns the handlers load via the cache.
+_POLLED_CANDIDATE_COLS = (User.id, User.bot_token, User.bot_config) + _CANDIDATE_SNAPSHOT_COLS
+
+class _SendRateLimiter(AIORateLimiter):
+    """AIORateLimiter that only throttles sends.
+
+    PTB puts every call with a negative chat_id under the 20/min group bucket, including
+    moderation deletes; during a spam wave those would queue for minutes while holding
+    concurrent_updates slots. Telegram doesn't count these endpoints against the send limits.
+    """
+
+    _UNTHROTTLED_ENDPOINTS = frozenset({"deleteMessage", "deleteMessages", "sendChatAction", "getMe"})
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if endpoint in self._UNTHROTTLED_ENDPOINTS:
+            return await callback(*args, **kwargs)
+        return await super().process_request(callback, args, kwargs, endpoint, data, rate_limit_args)
+
+
 # Global dictionary to track running bots: candidate_id -> Application
 running_bots: dict[int, Application] = {}
 
@@ -25,6 +60,7 @@ running_bots: dict[int, Application] = {}
 failed_bots: dict[int, datetime] = {}
 
 
+@lru_cache(maxsize=1)
 def _telegram_httpx_kwargs() -> dict:
     """Build httpx client kwargs for Telegram API calls.
 
@@ -33,6 +69,9 @@ def _telegram_httpx_kwargs() -> dict:
 
     - If TELEGRAM_PROXY_URL is set, it is used explicitly (supports socks5/http).
     - Else, TELEGRAM_TRUST_ENV=1 enables inheriting proxy env vars.
+
+    Resolved once per process (env + the auto trust_env probe); every bot start reuses it,
+    so callers must copy before modifying. Call .cache_clear() to re-read the environment.
     """
 
     explicit_proxy_url = (os.getenv("TELEGRAM_PROXY_URL") or "").strip()
@@ -68,10 +107,32 @@ def _telegram_httpx_kwargs() -> dict:
     return {"trust_env": False}
 
 
+@lru_cache(maxsize=1)
+def _telegram_polling_timeouts() -> tuple[int, float]:
+    """(long-polling timeout, read_timeout) for start_polling; resolved once per process."""
+    httpx_kwargs = _telegram_httpx_kwargs()
+    using_proxy = bool(httpx_kwargs.get("trust_env")) or bool(httpx_kwargs.get("proxy"))
+
+    # In proxy environments, long-lived tunnels are more likely to be dropped. Keep the
+    # long-polling timeout shorter to reduce RemoteProtocolError frequency.
+    poll_timeout_raw = (os.getenv("TELEGRAM_POLLING_TIMEOUT") or "").strip()
+    if poll_timeout_raw:
+        try:
+            poll_timeout = int(poll_timeout_raw)
+        except ValueError:
+            poll_timeout = 10
+    else:
+        poll_timeout = 5 if using_proxy else 10
+    if poll_timeout < 1:
+        poll_timeout = 1
+
+    # read_timeout must be > poll_timeout because Telegram uses long polling.
+    return poll_timeout, max(30.0, float(poll_timeout + 20))
+
+
 async def run_bot(candidate: User):
     from .handlers import chatid_command, debug_update_logger, error_handler, handle_message, myid_command, start_command
 
-    import time
     while True:
         try:
             if not candidate.bot_token:
@@ -86,24 +147,8 @@ async def run_bot(candidate: User):
 
             bot_config = getattr(candidate, "bot_config", None) or {}
 
-            httpx_kwargs = _telegram_httpx_kwargs()
-            using_proxy = bool(httpx_kwargs.get("trust_env")) or bool(httpx_kwargs.get("proxy"))
-
-            # In proxy environments, long-lived tunnels are more likely to be dropped. Keep the
-            # long-polling timeout shorter to reduce RemoteProtocolError frequency.
-            poll_timeout_raw = (os.getenv("TELEGRAM_POLLING_TIMEOUT") or "").strip()
-            if poll_timeout_raw:
-                try:
-                    poll_timeout = int(poll_timeout_raw)
-                except ValueError:
-                    poll_timeout = 10
-            else:
-                poll_timeout = 5 if using_proxy else 10
-            if poll_timeout < 1:
-                poll_timeout = 1
-
-            # read_timeout must be > poll_timeout because Telegram uses long polling.
-            poll_read_timeout = max(30.0, float(poll_timeout + 20))
+            httpx_kwargs = dict(_telegram_httpx_kwargs())
+            poll_timeout, poll_read_timeout = _telegram_polling_timeouts()
 
             def polling_error_callback(exc):
                 # Updater will keep retrying in network_retry_loop. For expected, transient proxy
@@ -147,7 +192,7 @@ async def run_bot(candidate: User):
                 write_timeout=20,
                 connect_timeout=20,
                 pool_timeout=5,
-                http_version="1.1",
+                http_version=TELEGRAM_HTTP_VERSION,
                 httpx_kwargs=httpx_kwargs,
             )
             request = HTTPXRequest(**request_kwargs)
@@ -163,8 +208,17 @@ async def run_bot(candidate: User):
                             builder = builder.concurrent_updates(BOT_CONCURRENT_UPDATES)
                     except Exception:
                         pass
+                    persistence = user_data_persistence(candidate.id)
+                    if persistence is not None:
+                        builder = builder.persistence(persistence)
+                    if TELEGRAM_RATE_LIMIT:
+                        # Defaults match Telegram's limits; no built-in retries, safe_reply_text
+                        # already handles RetryAfter.
+                        builder = builder.rate_limiter(_SendRateLimiter())
                     application = builder.build()
                     application.bot_data["candidate_id"] = candidate.id
+                    # Fixed per bot; kept fresh by check_for_new_candidates so /start needs no SELECT.
+                    application.bot_data["candidate"] = candidate_snapshot(candidate)
                     application.add_handler(CommandHandler("start", start_command))
                     application.add_handler(CommandHandler("chatid", chatid_command))
                     application.add_handler(CommandHandler("myid", myid_command))
@@ -210,7 +264,7 @@ async def run_bot(candidate: User):
         except Exception as e:
             logger.exception("Failed to start bot for %s (will auto-restart in 10s)", candidate.full_name)
             try:
-                log_technical_error_sync(
+                await log_technical_error(
                     service_name="telegram_bot",
                     error_type="StartFailed",
                     error_message=f"Failed to start polling for candidate_id={getattr(candidate, 'id', None)}: {e}",
@@ -220,7 +274,8 @@ async def run_bot(candidate: User):
                 )
             except Exception:
                 pass
-            time.sleep(10)
+            # Non-blocking: the other bots keep polling while this one waits to retry.
+            await asyncio.sleep(10)
             continue
 
 
@@ -246,67 +301,164 @@ async def stop_application(app: Application, *, candidate_id: int, reason: str)
         logger.warning("Failed shutting down app for candidate_id=%s: %s", candidate_id, e)
 
 
-async def check_for_new_candidates():
-    while True:
+async def _subscribe_candidate_events():
+    """Redis pub/sub on CANDIDATE_EVENTS_CHANNEL, or None (no REDIS_URL / Redis unreachable)."""
+    url = (os.getenv("REDIS_URL") or "").strip()
+    if not url:
+        return None
+    try:
+        import redis.asyncio as aioredis
+
+        pubsub = aioredis.Redis.from_url(url, decode_responses=True).pubsub()
+        await pubsub.subscribe(CANDIDATE_EVENTS_CHANNEL)
+        return pubsub
+    except Exception as e:
+        logger.warning("Candidate change events unavailable, polling every %ss: %s", BOT_CANDIDATE_POLL_SEC, e)
+        return None
+
+
+async def _wait_for_candidate_event(pubsub, timeout: float) -> bool | None:
+    """Sleep up to `timeout`: True on a candidate event, False on timeout, None if the subscription broke."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        while (remaining := deadline - loop.time()) > 0:
+            if await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining) is not None:
+                return True
+        return False
+    except Exception as e:
+        logger.warning("Candidate change subscription lost, polling every %ss: %s", BOT_CANDIDATE_POLL_SEC, e)
         try:
-            def get_active_candidates():
-                db = SessionLocal()
-                try:
-                    return db.query(User).filter(User.role == "CANDIDATE", User.is_active == True).all()  # noqa: E712
-                finally:
-                    db.close()
+            await pubsub.aclose()
+        except Exception:
+            pass
+        return None
 
-            candidates = await run_db_query(get_active_candidates)
-            active_ids: set[int] = set()
 
-            for cid, app in list(running_bots.items()):
-                try:
-                    updater = getattr(app, "updater", None)
-                    updater_running = bool(updater and getattr(updater, "running", False))
-                    app_running = bool(getattr(app, "running", False))
-                    if not updater_running or not app_running:
-                        running_bots.pop(cid, None)
-                        await stop_application(app, candidate_id=cid, reason="healthcheck: updater/app not running")
-                        failed_bots[cid] = datetime.now(timezone.utc)
-                except Exception as e:
-                    logger.warning("Healthcheck failed for candidate_id=%s: %s", cid, e)
-
-            for candidate in candidates:
-                active_ids.add(int(candidate.id))
-                if candidate.id not in running_bots:
-                    last_failed_at = failed_bots.get(candidate.id)
-                    if last_failed_at and (datetime.now(timezone.utc) - last_failed_at) < FAILED_BOT_COOLDOWN:
-                        continue
-
-                    if candidate.bot_token:
-                        logger.info("Found new active candidate: %s. Starting bot...", candidate.full_name)
-                        app = await run_bot(candidate)
-                        if app:
-                            running_bots[candidate.id] = app
-                            failed_bots.pop(candidate.id, None)
-                        else:
-                            failed_bots[candidate.id] = datetime.now(timezone.utc)
-
-            ids_to_stop = [cid for cid in running_bots.keys() if cid not in active_ids]
-            for cid in ids_to_stop:
-                app = running_bots.pop(cid, None)
-                if app is None:
-                    continue
-                await stop_application(app, candidate_id=cid, reason="candidate deactivated")
-                failed_bots.pop(cid, None)
+async def _stop_dead_bots() -> bool:
+    """Stop bots whose updater/app is no longer running. True if any was stopped."""
+    stopped = False
+    for cid, app in list(running_bots.items()):
+        try:
+            updater = getattr(app, "updater", None)
+            updater_running = bool(updater and getattr(updater, "running", False))
+            app_running = bool(getattr(app, "running", False))
+            if not updater_running or not app_running:
+                running_bots.pop(cid, None)
+                await stop_application(app, candidate_id=cid, reason="healthcheck: updater/app not running")
+                failed_bots[cid] = datetime.now(timezone.utc)
+                stopped = True
+        except Exception as e:
+            logger.warning("Healthcheck failed for candidate_id=%s: %s", cid, e)
+    return stopped
+
+
+def _retry_due() -> bool:
+    now = datetime.now(timezone.utc)
+    return any(now - failed_at >= FAILED_BOT_COOLDOWN for failed_at in failed_bots.values())
 
+
+async def _refresh_candidates() -> None:
+    def get_active_candidates():
+        db = SessionLocal()
+        try:
+            # Rows outlive the session (run_bot, candidate_snapshot); touching a relationship
+            # such as plans/active_plan would be a detached lazy load, so make it raise up front.
+            return (
+                db.query(User)
+                .options(load_only(*_POLLED_CANDIDATE_COLS, raiseload=True), raiseload("*"))
+                .filter(User.role == "CANDIDATE", User.is_active == True)  # noqa: E712
+                .all()
+            )
+        finally:
+            db.close()
+
+    candidates = await run_db_query(get_active_candidates)
+    active_ids: set[int] = set()
+
+    for candidate in candidates:
+        active_ids.add(int(candidate.id))
+        running_app = running_bots.get(candidate.id)
+        if running_app is not None:
+            running_app.bot_data["candidate"] = candidate_snapshot(candidate)
+        if candidate.id not in running_bots:
+            last_failed_at = failed_bots.get(candidate.id)
+            if last_failed_at and (datetime.now(timezone.utc) - last_failed_at) < FAILED_BOT_COOLDOWN:
+                continue
+
+            if candidate.bot_token:
+                logger.info("Found new active candidate: %s. Starting bot...", candidate.full_name)
+                app = await run_bot(candidate)
+                if app:
+                    running_bots[candidate.id] = app
+                    failed_bots.pop(candidate.id, None)
+                else:
+                    failed_bots[candidate.id] = datetime.now(timezone.utc)
+
+    ids_to_stop = [cid for cid in running_bots.keys() if cid not in active_ids]
+    for cid in ids_to_stop:
+        app = running_bots.pop(cid, None)
+        if app is None:
+            continue
+        await stop_application(app, candidate_id=cid, reason="candidate deactivated")
+        failed_bots.pop(cid, None)
+
+    # Inactive or token-less candidates never retry, so their entries would keep _retry_due() true.
+    startable_ids = {int(c.id) for c in candidates if c.bot_token}
+    for cid in [cid for cid in failed_bots if cid not in startable_ids]:
+        failed_bots.pop(cid, None)
+
+
+async def check_for_new_candidates():
+    """Every BOT_CANDIDATE_POLL_SEC: stop dead bots, and re-read candidates when needed.
+
+    Without Redis the candidate list is re-read on every tick. With the pub/sub subscription
+    it is re-read on a candidate event, after a bot was stopped or its restart cooldown ran
+    out, and at least every BOT_CANDIDATE_EVENT_POLL_SEC as a safety net. A broken
+    subscription is re-established on the next tick.
+    """
+    loop = asyncio.get_running_loop()
+    events = await _subscribe_candidate_events()
+    refresh_at = 0.0
+    while True:
+        try:
+            if await _stop_dead_bots() or _retry_due():
+                refresh_at = 0.0
+            if events is None or loop.time() >= refresh_at:
+                await _refresh_candidates()
+                refresh_at = loop.time() + BOT_CANDIDATE_EVENT_POLL_SEC
         except Exception as e:
             logger.error("Error in candidate check loop: %s", e)
 
-        await asyncio.sleep(10)
+        if events is None:
+            await asyncio.sleep(BOT_CANDIDATE_POLL_SEC)
+            events = await _subscribe_candidate_events()
+            refresh_at = 0.0
+            continue
+        got_event = await _wait_for_candidate_event(events, BOT_CANDIDATE_POLL_SEC)
+        if got_event is None:
+            events = None
+        elif got_event:
+            refresh_at = 0.0
 
 
 async def main() -> None:
     # Ensure DB tables exist
     Base.metadata.create_all(bind=engine)
+    # The duplicate-question check only sees hashed rows; the API does this too on startup.
+    backfill_question_text_hashes(engine)
+    warm_pool()
+
+    # run_db_query offloads to the default executor; size it for concurrent DB work
+    # across all bots instead of asyncio's CPU-count based default.
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=BOT_DB_THREADS, thread_name_prefix="bot-db")
+    )
 
     logger.info("Starting Bot Runner Service...")
     checker_task = asyncio.create_task(check_for_new_candidates())
+    bot_user_writer_task = asyncio.create_task(bot_user_writer())
+    telemetry_writer_task = asyncio.create_task(telemetry_writer())
 
     stop_signal = asyncio.Event()
     try:
@@ -315,6 +467,8 @@ async def main() -> None:
         logger.info("Stopping bots...")
         stop_signal.set()
         checker_task.cancel()
+        bot_user_writer_task.cancel()
+        telemetry_writer_task.cancel()
 
         for app in running_bots.values():
             try:
@@ -1,15 +1,27 @@
 import asyncio
 import html
 import json
+import random
 import re
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from functools import lru_cache
 from typing import Any
 
 import jdatetime
 from telegram.error import NetworkError, TimedOut, RetryAfter
 
 
+_WHITESPACE_RE = re.compile(r"\s+")
+_HASHTAG_INVALID_RE = re.compile(r"[^0-9A-Za-z_\u0600-\u06FF]")
+_UNDERSCORES_RE = re.compile(r"_+")
+_BAD_UNICODE_ESCAPE_RE = re.compile(r"\\u(?![0-9a-fA-F]{4})")
+_BAD_BACKSLASH_RE = re.compile(r"\\(?![\"\\/bfnrtu])")
+_FA_DIGITS_TRANS = str.maketrans("0123456789", "۰۱۲۳۴۵۶۷۸۹")
+
+
 def normalize_text(value) -> str:
+    if isinstance(value, str):
+        return value.strip()
     if value is None:
         return ""
     return str(value).strip()
@@ -24,9 +36,9 @@ def repair_suspicious_json_backslashes(text: str) -> str:
     if not text:
         return text
     # "\u" is valid only if followed by 4 hex digits.
-    fixed = re.sub(r"\\u(?![0-9a-fA-F]{4})", r"\\\\u", text)
+    fixed = _BAD_UNICODE_ESCAPE_RE.sub(r"\\\\u", text)
     # Any other backslash must start a valid JSON escape sequence.
-    fixed = re.sub(r"\\(?![\"\\/bfnrtu])", r"\\\\", fixed)
+    fixed = _BAD_BACKSLASH_RE.sub(r"\\\\", fixed)
     return fixed
 
 
@@ -49,32 +61,46 @@ def json_loads_loose(text: str) -> Any | None:
             return None
 
 
+# Invisible/formatting characters that can appear in Telegram button labels (bidi marks,
+# zero-width chars, variation selectors); stripping them keeps routing robust.
+_INVISIBLE_CHARS_TRANS = dict.fromkeys(
+    map(
+        ord,
+        (
+            "\u200b",  # zero-width space
+            "\u200c",  # ZWNJ
+            "\u200d",  # ZWJ
+            "\u200e",  # LRM
+            "\u200f",  # RLM
+            "\u2060",  # word joiner
+            "\ufeff",  # BOM
+            "\ufe0e",  # text variation selector
+            "\ufe0f",  # emoji variation selector
+            "\u2066",  # LRI
+            "\u2067",  # RLI
+            "\u2068",  # FSI
+            "\u2069",  # PDI
+            "\u202a",  # LRE
+            "\u202b",  # RLE
+            "\u202c",  # PDF
+            "\u202d",  # LRO
+            "\u202e",  # RLO
+        ),
+    )
+)
+
+
 def normalize_button_text(value: str | None) -> str:
-    v = normalize_text(value)
-    # Strip common invisible/formatting characters that can appear in Telegram button labels
-    # (bidi marks, zero-width chars, variation selectors). This keeps routing robust.
-    for ch in (
-        "\u200b",  # zero-width space
-        "\u200c",  # ZWNJ
-        "\u200d",  # ZWJ
-        "\u200e",  # LRM
-        "\u200f",  # RLM
-        "\u2060",  # word joiner
-        "\ufeff",  # BOM
-        "\ufe0e",  # text variation selector
-        "\ufe0f",  # emoji variation selector
-        "\u2066",  # LRI
-        "\u2067",  # RLI
-        "\u2068",  # FSI
-        "\u2069",  # PDI
-        "\u202a",  # LRE
-        "\u202b",  # RLE
-        "\u202c",  # PDF
-        "\u202d",  # LRO
-        "\u202e",  # RLO
-    ):
-        v = v.replace(ch, "")
-    v = re.sub(r"\s+", " ", v).strip()
+    return _normalize_button_str(value if isinstance(value, str) else normalize_text(value))
+
+
+# Memoized: the BTN_* targets are constants, and one update's text goes through dozens of
+# btn_eq/btn_has checks in handle_message, so both sides are normalized once.
+@lru_cache(maxsize=1024)
+def _normalize_button_str(value: str) -> str:
+    # One translate() pass instead of a str.replace() per invisible character.
+    v = value.strip().translate(_INVISIBLE_CHARS_TRANS)
+    v = _WHITESPACE_RE.sub(" ", v).strip()
     return v
 
 
@@ -102,17 +128,27 @@ async def safe_reply_text(message, text: str, **kwargs):
     for attempt in range(3):
         try:
             return await message.reply_text(text, **kwargs)
-        except RetryAfter as e:
-            await asyncio.sleep(float(getattr(e, "retry_after", 1.0)) + 0.5)
-        except (TimedOut, NetworkError):
-            if attempt >= 2:
+        except (RetryAfter, TimedOut, NetworkError) as e:
+            is_flood = isinstance(e, RetryAfter)
+            if attempt >= 2 and not is_flood:
                 raise
-            await asyncio.sleep(0.75 * (attempt + 1))
+            # Exponential backoff with jitter so handlers hit by the same proxy/network blip
+            # don't all retry in the same instant; flood control adds Telegram's wait on top.
+            delay = random.uniform(0.5, 1.5) * 0.5 * (2**attempt)
+            if is_flood:
+                delay += float(getattr(e, "retry_after", 1.0))
+            await asyncio.sleep(delay)
 
 
 def to_fa_digits(value: str) -> str:
-    trans = str.maketrans("0123456789", "۰۱۲۳۴۵۶۷۸۹")
-    return str(value).translate(trans)
+    return str(value).translate(_FA_DIGITS_TRANS)
+
+
+# Listings show many items from the same few days; the jdatetime conversion is per date.
+@lru_cache(maxsize=1024)
+def _jalali_ymd(d: date) -> str:
+    jd = jdatetime.date.fromgregorian(date=d)
+    return to_fa_digits(jd.strftime("%Y/%m/%d"))
 
 
 def to_jalali_date_ymd(dt: datetime | None) -> str:
@@ -122,8 +158,7 @@ def to_jalali_date_ymd(dt: datetime | None) -> str:
         if isinstance(dt, datetime):
             if getattr(dt, "tzinfo", None) is not None:
                 dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
-        jd = jdatetime.date.fromgregorian(date=dt.date())
-        return to_fa_digits(jd.strftime("%Y/%m/%d"))
+        return _jalali_ymd(dt.date())
     except Exception:
         try:
             return to_fa_digits(dt.strftime("%Y/%m/%d"))
@@ -163,6 +198,85 @@ def format_public_feedback_answer_block(*, tag: str | None, feedback_text: str,
     return "\n\n".join([p for p in parts if p]).strip()
 
 
+def _commitment_status(value: str | None) -> str:
+    # Spec only asks for two states; treat everything else as "in progress".
+    if (value or "").strip().lower() == "completed":
+        return "✅ انجام‌شده"
+    return "🟡 در حال پیگیری"
+
+
+def _shorten_inline(text: str, max_len: int) -> str:
+    s = _WHITESPACE_RE.sub(" ", normalize_text(text)).strip()
+    if len(s) <= max_len:
+        return s
+    return s[: max(0, max_len - 1)].rstrip() + "…"
+
+
+def _summary_3_lines(text: str, *, max_lines: int = 3, line_len: int = 46) -> str:
+    # \s+ also matches CR/LF, so this one pass flattens line breaks too.
+    s = _WHITESPACE_RE.sub(" ", normalize_text(text)).strip()
+    if not s:
+        return ""
+    words = s.split(" ")
+    lines: list[str] = []
+    cur = ""
+    idx = 0
+
+    while idx < len(words) and len(lines) < max_lines:
+        w = words[idx]
+        candidate = (cur + " " + w) if cur else w
+        if len(candidate) <= line_len:
+            cur = candidate
+            idx += 1
+            continue
+
+        if cur:
+            lines.append(cur)
+            cur = ""
+            continue
+
+        # single very-long word
+        lines.append(w[: max(1, line_len - 1)] + "…")
+        idx += 1
+
+    if cur and len(lines) < max_lines:
+        lines.append(cur)
+
+    if idx < len(words) and lines:
+        # Ensure last line ends with ellipsis.
+        if not lines[-1].endswith("…"):
+            if len(lines[-1]) >= line_len:
+                lines[-1] = lines[-1][: max(1, line_len - 1)].rstrip() + "…"
+            else:
+                lines[-1] = lines[-1].rstrip() + "…"
+
+    return "\n".join(lines[:max_lines]).strip()
+
+
+def format_commitment_card(index: int, row: dict) -> str:
+    """One commitment as a short card (title, status, 3-line summary, date) for the bot list."""
+    dt = None
+    created_at = normalize_text(row.get("created_at"))
+    if created_at:
+        try:
+            dt = datetime.fromisoformat(created_at)
+        except Exception:
+            dt = None
+    date_label = to_jalali_date_ymd(dt) if dt else "—"
+
+    title = _shorten_inline(row.get("title", ""), 60)
+    summary = _summary_3_lines(row.get("body", ""))
+    title_line = f"عنوان: {title}\n" if title else ""
+    summary_block = f"خلاصه:\n{summary}\n" if summary else ""
+    return (
+        f"🧾 تعهد شماره {to_fa_digits(index)}\n"
+        f"{title_line}"
+        f"وضعیت: {_commitment_status(str(row.get('status') or ''))}\n"
+        f"{summary_block}"
+        f"📅 تاریخ ثبت: {date_label}"
+    )
+
+
 def _topic_base_and_label(topic: str) -> tuple[str, str]:
     t = normalize_text(topic)
     if not t:
@@ -182,8 +296,8 @@ def _make_hashtag(text: str) -> str:
     if not t:
         return ""
     t = t.replace(" ", "_")
-    t = re.sub(r"[^0-9A-Za-z_\u0600-\u06FF]", "", t)
-    t = re.sub(r"_+", "_", t).strip("_")
+    t = _HASHTAG_INVALID_RE.sub("", t)
+    t = _UNDERSCORES_RE.sub("_", t).strip("_")
     return f"#{t}" if t else ""
 
 
@@ -237,26 +351,44 @@ def format_public_question_answer_card_html(*, idx: int, topic: str, question: s
     return "\n".join([p for p in parts if p is not None]).strip()
 
 
+# Telegram caps a message at 4096 characters, counted in UTF-16 code units (emoji outside the
+# BMP count twice). Packing chunks up to the real cap means fewer sequential sendMessage
+# round trips for long lists; chunks stay sequential so they arrive in order.
+_TG_MESSAGE_MAX_LEN = 4096
+
+
+def _tg_len(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _pack_chunks(parts: list[str], *, sep: str, first: str = "") -> list[str]:
+    """Join `parts` with `sep` into as few messages as fit under Telegram's length cap."""
+    sep_len = _tg_len(sep)
+    chunks: list[str] = []
+    current: list[str] = [first] if first else []
+    current_len = _tg_len(first) if first else 0
+    for part in parts:
+        part_len = _tg_len(part)
+        if current and current_len + sep_len + part_len > _TG_MESSAGE_MAX_LEN:
+            chunks.append(sep.join(current))
+            current, current_len = [part], part_len
+        else:
+            current_len += (sep_len if current else 0) + part_len
+            current.append(part)
+    if current:
+        chunks.append(sep.join(current))
+    return chunks
+
+
 async def send_question_list_message(*, safe_reply, update_message, topic: str, items: list[dict], back_keyboard):
     header = f"🗂 {topic}\n\nتمام سؤال‌های این بخش (شماره را ارسال کنید):\n"
     lines: list[str] = []
     for idx, it in enumerate(items, start=1):
         q = normalize_text(it.get("q") or "")
-        q = re.sub(r"\s+", " ", q).strip()
+        q = _WHITESPACE_RE.sub(" ", q).strip()
         lines.append(f"{idx}) {q}" if q else f"{idx})")
 
-    max_len = 3500
-    chunks: list[str] = []
-    current = header
-    for ln in lines:
-        candidate = (current + "\n" + ln) if current else ln
-        if len(candidate) > max_len and current:
-            chunks.append(current)
-            current = ln
-        else:
-            current = candidate
-    if current:
-        chunks.append(current)
+    chunks = _pack_chunks(lines, sep="\n", first=header)
 
     for i, ch in enumerate(chunks):
         rm = back_keyboard if i == len(chunks) - 1 else None
@@ -287,18 +419,7 @@ async def send_question_answers_message(*, safe_reply, update_message, topic: st
         )
         return
 
-    max_len = 3500
-    chunks: list[str] = []
-    current = ""
-    for blk in blocks:
-        candidate = (current + "\n\n" + blk) if current else blk
-        if len(candidate) > max_len and current:
-            chunks.append(current)
-            current = blk
-        else:
-            current = candidate
-    if current:
-        chunks.append(current)
+    chunks = _pack_chunks(blocks, sep="\n\n")
 
     for i, ch in enumerate(chunks):
         rm = back_keyboard if i == len(chunks) - 1 else None
@@ -332,18 +453,7 @@ async def send_question_answers_message_cards_html(*, safe_reply, update_message
         )
         return
 
-    max_len = 3500
-    chunks: list[str] = []
-    current = ""
-    for blk in blocks:
-        candidate = (current + "\n\n" + blk) if current else blk
-        if len(candidate) > max_len and current:
-            chunks.append(current)
-            current = blk
-        else:
-            current = candidate
-    if current:
-        chunks.append(current)
+    chunks = _pack_chunks(blocks, sep="\n\n")
 
     for i, ch in enumerate(chunks):
         rm = back_keyboard if i == len(chunks) - 1 else None
@@ -356,6 +466,9 @@ async def send_question_answers_message_cards_html(*, safe_reply, update_message
         )
 
 
+_TG_USERNAME_RE = re.compile(r"[A-Za-z0-9_]{4,}")
+
+
 def normalize_telegram_link(value: str) -> str:
     v = normalize_text(value)
     if not v:
@@ -366,7 +479,7 @@ def normalize_telegram_link(value: str) -> str:
         return "https://" + v
     if v.startswith("http://") or v.startswith("https://"):
         return v
-    if re.fullmatch(r"[A-Za-z0-9_]{4,}", v):
+    if _TG_USERNAME_RE.fullmatch(v):
         return f"https://t.me/{v}"
     return v
 
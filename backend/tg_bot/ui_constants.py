@@ -133,11 +133,15 @@ FEEDBACK_INTRO_TEXT = (
 )
 
 
+_LIST_CHOICE_RE = re.compile(r"^(\d{1,2})\)")
+_LIST_NUMBER_RE = re.compile(r"\d{1,3}")
+
+
 def parse_question_list_choice(user_text: str | None, *, normalize_button_text) -> int | None:
     t = normalize_button_text(user_text)
-    m = re.match(r"^(\d{1,2})\)", t)
+    m = _LIST_CHOICE_RE.match(t)
     if not m:
-        if re.fullmatch(r"\d{1,3}", t):
+        if _LIST_NUMBER_RE.fullmatch(t):
             try:
                 return int(t)
             except Exception:
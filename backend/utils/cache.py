@@ -4,15 +4,19 @@ import json
 import os
 import threading
 import time
+from functools import lru_cache
 from typing import Any
 
 
-class _MemoryCache:
-    def __init__(self) -> None:
+class MemoryCache:
+    """Thread-safe in-process TTL cache. Values are stored as-is (no serialization)."""
+
+    def __init__(self, maxsize: int | None = None) -> None:
         self._lock = threading.Lock()
-        self._items: dict[str, tuple[float, str]] = {}
+        self._items: dict[str, tuple[float, Any]] = {}
+        self._maxsize = maxsize
 
-    def get(self, key: str) -> str | None:
+    def get(self, key: str) -> Any | None:
         now = time.time()
         with self._lock:
             item = self._items.get(key)
@@ -24,22 +28,37 @@ class _MemoryCache:
                 return None
             return value
 
-    def set(self, key: str, value: str, ttl_s: int) -> None:
+    def set(self, key: str, value: Any, ttl_s: int) -> None:
         ttl_s = max(0, int(ttl_s))
         if ttl_s <= 0:
             return
         expires_at = time.time() + ttl_s
         with self._lock:
+            if self._maxsize is not None and key not in self._items and len(self._items) >= self._maxsize:
+                # Evict the entry closest to expiry; cheap enough at the sizes we use.
+                oldest = min(self._items, key=lambda k: self._items[k][0])
+                self._items.pop(oldest, None)
             self._items[key] = (expires_at, value)
 
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
 
-_mem_cache = _MemoryCache()
+_mem_cache = MemoryCache()
 
 
 def _get_redis_client():
     url = (os.getenv("REDIS_URL") or "").strip()
     if not url:
         return None
+    return _redis_client_for(url)
+
+
+@lru_cache(maxsize=4)
+def _redis_client_for(url: str):
+    # One client (and its connection pool) per URL; from_url() per call would open a new
+    # TCP connection for every cache lookup.
     try:
         import redis  # type: ignore
 
@@ -86,3 +105,46 @@ def cache_set_json(key: str, value: Any, ttl_s: int) -> None:
             pass
 
     _mem_cache.set(key, raw, ttl_s)
+
+
+def cache_delete(*keys: str) -> None:
+    keys = tuple(str(k) for k in keys)
+    if not keys:
+        return
+
+    r = _get_redis_client()
+    if r is not None:
+        try:
+            r.delete(*keys)
+        except Exception:
+            pass
+
+    for key in keys:
+        _mem_cache.delete(key)
+
+
+_CANDIDATE_CACHE_KINDS = ("snapshot", "profile")
+
+
+def candidate_cache_key(kind: str, candidate_id: int) -> str:
+    """Key for the bot's cached candidate rows (see tg_bot.db_ops); shared with the API for invalidation."""
+    return f"candidate:{kind}:{int(candidate_id)}"
+
+
+def invalidate_candidate_cache(candidate_id: int) -> None:
+    cache_delete(*(candidate_cache_key(kind, candidate_id) for kind in _CANDIDATE_CACHE_KINDS))
+
+
+# Pub/sub channel the bot runner listens on to pick up created/edited/deleted candidates
+# right away instead of on its next poll. Needs REDIS_URL; without it this is a no-op.
+CANDIDATE_EVENTS_CHANNEL = "candidate:events"
+
+
+def publish_candidate_changed(candidate_id: int) -> None:
+    r = _get_redis_client()
+    if r is None:
+        return
+    try:
+        r.publish(CANDIDATE_EVENTS_CHANNEL, str(int(candidate_id)))
+    except Exception:
+        pass
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import hashlib
+import re
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def question_text_hash(text: str | None) -> str | None:
+    """16-hex-char digest of a question's text, whitespace-collapsed and lowercased.
+
+    Stored in bot_submissions.text_hash so "was this question already asked?" is an index
+    probe instead of a scan over recent rows. Returns None for blank text.
+    """
+    norm = _WHITESPACE_RE.sub(" ", str(text or "")).strip().lower()
+    if not norm:
+        return None
+    return hashlib.blake2b(norm.encode("utf-8"), digest_size=8).hexdigest()